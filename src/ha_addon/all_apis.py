@@ -5,7 +5,13 @@ from dataclasses import dataclass, field
 
 from mqtt_entity import MQTTClient
 
-from ha_addon.ha_api import HaRestApi, HaWebsocketApi, LogBase
+from ha_addon.ha_api import (
+    SESSIONS,
+    HaRestApi,
+    HaWebsocketApi,
+    LogBase,
+    WriteCoalescer,
+)
 
 
 @dataclass
@@ -16,6 +22,7 @@ class HaAllApis[T](LogBase):
     rest: HaRestApi = field(init=False, repr=False)
     ws: HaWebsocketApi = field(init=False, repr=False)
     mqtt: MQTTClient = field(init=False, repr=False)
+    writes: WriteCoalescer = field(init=False, repr=False)
 
     _log_prefix = "HA APIs: "
 
@@ -25,6 +32,7 @@ class HaAllApis[T](LogBase):
         self.rest = None  # type: ignore[assignment]
         self.ws = None  # type: ignore[assignment]
         self.mqtt = None  # type: ignore[assignment]
+        self.writes = None  # type: ignore[assignment]
 
     async def connect_rest_ws(self) -> None:
         """Bootstrap the API clients."""
@@ -32,6 +40,8 @@ class HaAllApis[T](LogBase):
             self.rest = HaRestApi().set_from_options(self.opt)
         if self.ws is None:
             self.ws = HaWebsocketApi().set_from_options(self.opt)
+        if self.writes is None:
+            self.writes = WriteCoalescer(rest=self.rest, states=self.ws.states)
 
         # Check REST API
         time = 0
@@ -44,13 +54,15 @@ class HaAllApis[T](LogBase):
             await asyncio.sleep(time)
 
         # Check WS API
-        if not self.ws.connected:
+        if not self.ws.running_tasks:  # reconnects itself once started
             self.ws.async_start_ws_loop()
             await self.ws.wait_authenticated()
             self.ws.ping(interval=10)
 
     async def close(self) -> None:
         """Close the API clients."""
+        await self.writes.close()
         await self.rest.close()
         await self.ws.close()
         await self.mqtt.disconnect()
+        await SESSIONS.close()
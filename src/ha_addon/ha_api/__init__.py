@@ -10,12 +10,17 @@ See https://developers.home-assistant.io/docs/add-ons/communication
 """
 
 from .base import HaApiBase, LogBase
+from .coalesce import WriteCoalescer
 from .ha_rest import HaRestApi
 from .ha_websocket import HaWebsocketApi
+from .session import SESSIONS, SessionFactory
 
 __all__ = [
+    "SESSIONS",
     "HaApiBase",
     "HaRestApi",
     "HaWebsocketApi",
     "LogBase",
+    "SessionFactory",
+    "WriteCoalescer",
 ]
@@ -10,6 +10,9 @@ from typing import Any, Self
 from aiohttp import ClientSession
 from mqtt_entity.supervisor import token
 
+from .codec import CODEC, JsonCodec
+from .session import SESSIONS
+
 _LOG = logging.getLogger(__name__)
 
 
@@ -47,7 +50,8 @@ class HaApiBase(LogBase):
 
     url: str = "http://supervisor/core/"
     token: str = field(default_factory=lambda: token(warn=False) or "")
-    ses: ClientSession = field(default_factory=ClientSession)
+    ses: ClientSession = field(default_factory=SESSIONS.get)
+    codec: JsonCodec = field(default=CODEC, repr=False)
 
     def __post_init__(self) -> None:
         """Init."""
@@ -64,6 +68,6 @@ class HaApiBase(LogBase):
         return self
 
     async def close(self) -> None:
-        """Close the API session."""
-        if self.ses:
+        """Close the API session, unless shared (see SESSIONS)."""
+        if self.ses and not SESSIONS.owns(self.ses):
             await self.ses.close()
@@ -0,0 +1,37 @@
+"""JSON codecs for the HA API clients.
+
+Uses orjson when it is installed, with a stdlib fallback.
+Encoders return bytes, so websocket frames and request bodies skip the str round trip.
+"""
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class JsonCodec:
+    """A JSON loads/dumps pair."""
+
+    name: str
+    loads: Callable[[bytes | str], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _std_dumps(obj: Any) -> bytes:
+    """Encode with the stdlib json module."""
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+CODECS = {"json": JsonCodec("json", json.loads, _std_dumps)}
+
+try:
+    import orjson  # type: ignore[import-not-found]
+
+    CODECS["orjson"] = JsonCodec("orjson", orjson.loads, orjson.dumps)
+except ImportError:
+    pass
+
+CODEC = CODECS.get("orjson") or CODECS["json"]
+"""The fastest installed codec."""
@@ -10,17 +10,31 @@ See https://developers.home-assistant.io/docs/add-ons/communication
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, TypeVar, get_origin
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Self, TypeVar, get_origin
 from urllib.parse import urljoin
 
 from colorama import Fore, Style
 from mqtt_entity.options import CONVERTER
 
 from .base import HaApiBase
-from .types import HAEvents, HAService, HAState
+from .types import HAEvents, HAService, HAState, structure_list
 
 T = TypeVar("T", default=dict[str, Any])
+type CacheKey = tuple[str, str, bytes | None]
+
+CACHE_TTL = {
+    "api/config/config_entries/options/flow": 600,
+    "api/config": 3600,
+    "api/events": 3600,
+    "api/services": 3600,
+}
+"""Suggested cache_ttl for endpoints that rarely change."""
 
 
 @dataclass
@@ -28,6 +42,33 @@ class HaRestApi(HaApiBase):
     """Home Assistant REST API wrapper."""
 
     _log_prefix = "HA REST: "
+    max_parallel: int = 8
+    """Maximum number of concurrent requests, the HA_API_MAX_PARALLEL option."""
+    _sem: asyncio.Semaphore = field(init=False, repr=False)
+    cache_ttl: dict[str, float] = field(default_factory=dict)
+    """Seconds to cache responses, by endpoint url. Empty disables the cache."""
+    cache_size: int = 128
+    """Maximum number of cached responses."""
+    cache_hits: int = 0
+    """Responses served from the cache or a shared in-flight request."""
+    cache_misses: int = 0
+    """Cacheable requests sent to HA."""
+    _cache: OrderedDict[CacheKey, tuple[float, bytes]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _inflight: dict[CacheKey, asyncio.Task[bytes | None]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        """Init."""
+        super().__post_init__()
+        self._sem = asyncio.Semaphore(self.max_parallel)
+
+    def set_from_options(self, opt: object) -> Self:
+        """Set options from the given object, incl. an optional ha_api_max_parallel."""
+        self.max_parallel = getattr(opt, "ha_api_max_parallel", self.max_parallel)
+        return super().set_from_options(opt)
 
     def _head(self) -> dict[str, str]:
         """Return the headers for the HA API requests."""
@@ -63,14 +104,65 @@ class HaRestApi(HaApiBase):
         return_type: type[T] | None = None,
     ) -> T | None:
         """Send a request."""
+        ttl = self.cache_ttl.get(url, 0)
         url = urljoin(self.url, url)
+        body = None if data is None else self.codec.dumps(data)
+        fetch = partial(self._fetch, method, url, body, data)
+        raw = await (self._cached((method, url, body), ttl, fetch) if ttl else fetch())
+        if raw is None:
+            return None
+        if return_type is str or get_origin(return_type) is str:
+            return raw.decode()  # type: ignore[return-value]
+        return self.codec.loads(raw)
+
+    def cache_clear(self) -> None:
+        """Drop all cached responses."""
+        self._cache.clear()
+
+    async def _cached(
+        self,
+        key: CacheKey,
+        ttl: float,
+        fetch: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        """Return a cached response, join an identical request or fetch."""
+        hit = self._cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return hit[1]
+        if task := self._inflight.get(key):
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(partial(self._cache_store, key, ttl))
+        return await asyncio.shield(task)
+
+    def _cache_store(
+        self, key: CacheKey, ttl: float, task: asyncio.Task[bytes | None]
+    ) -> None:
+        """Cache a successful response, evict the least recently used."""
+        del self._inflight[key]
+        if task.cancelled() or task.exception() or (raw := task.result()) is None:
+            return
+        self._cache[key] = (time.monotonic() + ttl, raw)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _fetch(
+        self, method: str, url: str, body: bytes | None, data: dict[str, Any] | None
+    ) -> bytes | None:
+        """Send the request, return the body of a 200 response."""
         headers = self._head()
         self.log_debug("%s %s %s", method, url, data)
-        async with self.ses.request(method, url, headers=headers, json=data) as res:
+        async with (
+            self._sem,
+            self.ses.request(method, url, headers=headers, data=body) as res,
+        ):
             if res.status == 200:
-                if return_type is str or get_origin(return_type) is str:
-                    return await res.text()  # type: ignore[return-value]
-                return await res.json()
+                return await res.read()
             msg = f"{method} {url} returned"
             try:
                 msg += f" {await res.text()} [{res.status}]"
@@ -86,9 +178,12 @@ class HaRestApi(HaApiBase):
     ) -> list[HAState]:
         """Call a service - /api/services/<domain>/<service>."""
         res = await self.request(
-            f"api/services/{domain_service.replace('.', '/')}", data=data, method="POST"
+            f"api/services/{domain_service.replace('.', '/')}",
+            data=data,
+            method="POST",
+            return_type=list[dict[str, Any]],
         )
-        return CONVERTER.structure(res, list[HAState]) if res else []
+        return structure_list(HAState, res) if res else []
 
     async def get_config(self) -> dict[str, Any] | None:
         """Get the Home Assistant configuration - /api/config."""
@@ -113,12 +208,12 @@ class HaRestApi(HaApiBase):
     async def get_state(self, entity_id: str) -> HAState | None:
         """Get the Home Assistant states - /api/states."""
         res = await self.request(f"api/states/{entity_id}", None)
-        return CONVERTER.structure(res, HAState) if res else None
+        return structure_list(HAState, [res])[0] if res else None
 
     async def get_states(self) -> list[HAState]:
         """Get the Home Assistant states - /api/states."""
-        res = await self.request("api/states", None)
-        return CONVERTER.structure(res, list[HAState]) if res else []
+        res = await self.request("api/states", None, return_type=list[dict[str, Any]])
+        return structure_list(HAState, res) if res else []
 
     async def is_running(self) -> bool:
         """Check if the API is available - /api."""
@@ -127,17 +222,31 @@ class HaRestApi(HaApiBase):
 
     async def set_entity_state(self, entity_id: str, state: str) -> None:
         """Set the state of an entity - /api/states/<entity_id>."""
-        domain, _, _ = entity_id.partition(".")
-        if domain not in ("light", "switch"):
-            self.log_warn(
-                f"{domain} is not a valid domain for setting state. Use call_service instead.",
+        await self.set_entity_states([entity_id], state)
+
+    async def set_entity_states(self, entity_ids: list[str], state: str) -> int:
+        """Set the state of entities, one turn_on/turn_off call per domain.
+
+        Return the number of service calls made.
+        """
+        by_domain = dict[str, list[str]]()
+        for eid in entity_ids:
+            domain, _, _ = eid.partition(".")
+            if domain not in ("light", "switch"):
+                self.log_warn(
+                    f"{domain} is not a valid domain for setting state. Use call_service instead.",
+                )
+                continue
+            by_domain.setdefault(domain, []).append(eid)
+        self.log_debug("Setting state of %s to %s", entity_ids, state)
+        service = "turn_on" if state == "on" else "turn_off"
+        await asyncio.gather(
+            *(
+                self.call_service(f"{domain}.{service}", {"entity_id": eids})
+                for domain, eids in by_domain.items()
             )
-            return
-        self.log_debug("Setting state of %s to %s", entity_id, state)
-        await self.call_service(
-            f"{domain}.turn_on" if state == "on" else f"{domain}.turn_off",
-            {"entity_id": entity_id},
         )
+        return len(by_domain)
 
     async def get_config_entry_options(
         self, config_entry_id: str
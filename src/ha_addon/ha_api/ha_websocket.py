@@ -11,22 +11,26 @@ See https://developers.home-assistant.io/docs/add-ons/communication
 from __future__ import annotations
 
 import asyncio
+import heapq
 import inspect
-import json
-from collections.abc import Callable, Coroutine
+import random
+import time
+from collections.abc import AsyncIterator, Callable, Coroutine
 from dataclasses import dataclass, field
+from datetime import UTC, datetime
 from inspect import iscoroutinefunction
-from typing import Any, TypeIs, cast
+from typing import Any, Literal, TypeIs, cast
 from urllib.parse import urljoin
 
 from aiohttp import ClientWebSocketResponse, WSMsgType
-from mqtt_entity.options import CONVERTER
 
-from .base import _LOG, HaApiBase
-from .types import HAEntity
+from .base import HaApiBase
+from .types import HAEntity, HAEntityShort, HAState, structure_list
 
 type MsgCallback = Callable[[dict[str, Any]], Coroutine[None, None, None]]
 
+type StatesCallback = Callable[[list[HAState]], Coroutine[None, None, None]]
+
 type StrCallback = Callable[[str], Coroutine[None, None, None]] | Callable[[str], None]
 
 type StrOrMsgCallback = (
@@ -36,11 +40,28 @@ type StrOrMsgCallback = (
 )
 
 
+@dataclass
+class EventQueue:
+    """Events for one subscription, served in order by a worker task."""
+
+    queue: asyncio.Queue[tuple[float, dict[str, Any]]]
+    dropped: int = 0
+    """Events dropped on overflow."""
+    lag: float = 0.0
+    """Seconds the last event waited in the queue."""
+    worker: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        """Events waiting in the queue."""
+        return self.queue.qsize()
+
+
 @dataclass
 class HaWebsocketBase(HaApiBase):
     """Home Assistant Websocket API wrapper."""
 
-    _ws: ClientWebSocketResponse = field(init=False)
+    _ws: ClientWebSocketResponse[Literal[False]] = field(init=False)
     _ws_id: int = -1  # no auth
     running_tasks: list[asyncio.Task] = field(
         default_factory=list, init=False, repr=False
@@ -54,10 +75,46 @@ class HaWebsocketBase(HaApiBase):
     ws_result_waiters: dict[int, asyncio.Future[dict[str, Any]]] = field(
         default_factory=dict, init=False, repr=False
     )
+    ws_event_queues: dict[int, EventQueue] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _deadlines: list[tuple[float, int]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    """Heap of (deadline, id) for ws_result_waiters."""
+    _deadline_timer: asyncio.TimerHandle | None = field(
+        default=None, init=False, repr=False
+    )
+    subscriptions: dict[int, tuple[dict[str, Any], MsgCallback, int | None]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    """Subscription messages & queue sizes by handle, replayed after a reconnect."""
+    ws_queue_sizes: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    """Queue sizes by wire id, for subscriptions that override event_queue_size."""
+    subscription_ids: dict[int, int] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    """The wire id of each subscription handle on the current connection."""
+    _sub_handle: int = field(default=0, init=False, repr=False)
+    connections: int = field(default=0, init=False)
+    """Successful authentications, increments on every reconnect."""
+    auth_failed: bool = field(default=False, init=False)
+    """Stops reconnecting, the token was rejected."""
+    reconnect_max_delay: float = 30
+    """Maximum seconds between reconnect attempts."""
+    event_queue_size: int = 100
+    """Events queued per subscription, the oldest is dropped when full.
+
+    0 runs the handlers inline in ws_loop. A subscription can override the size,
+    see subscribe.
+    """
     _log_prefix = "HA WS: "
     _ha_authenticated: asyncio.Event = field(
         default_factory=asyncio.Event, init=False, repr=False
     )
+    _stopped: asyncio.Event = field(
+        default_factory=asyncio.Event, init=False, repr=False
+    )
 
     def __post_init__(self) -> Any:
         """Post initialization."""
@@ -74,25 +131,81 @@ class HaWebsocketBase(HaApiBase):
         )
 
     def async_start_ws_loop(self) -> None:
-        """Start the websocket API."""
-        if self.connected:
+        """Start the websocket API, reconnecting until closed."""
+        if self.running_tasks:
             raise RuntimeError("Websocket already started")
-        self.running_tasks.clear()
-        self.running_tasks.append(asyncio.create_task(self.ws_loop()))
+        self.auth_failed = False
+        self._stopped.clear()
+        self.running_tasks.append(asyncio.create_task(self.ws_supervisor()))
+
+    async def ws_supervisor(self) -> None:
+        """Run ws_loop, reconnect with jittered exponential backoff.
+
+        Stops when closed or when the token is rejected, see wait_stopped.
+        """
+        delay = 0.0
+        try:
+            while self.running_tasks:
+                start = time.monotonic()
+                try:
+                    await self.ws_loop()
+                except Exception as e:
+                    self.log_error(f"Websocket connection failed: {e}")
+                self._disconnected()
+                if self.auth_failed:
+                    return
+                if time.monotonic() - start > self.reconnect_max_delay:
+                    delay = 0  # was up for a while, retry fast
+                delay = min(max(delay * 2, 0.1), self.reconnect_max_delay)
+                wait = random.uniform(0, delay)
+                self.log_warn(f"Websocket reconnecting in {wait:.2f}s")
+                await asyncio.sleep(wait)
+        finally:
+            for task in self.running_tasks:  # ping & workers
+                if task is not asyncio.current_task():
+                    task.cancel()
+            self.running_tasks.clear()
+            self._stopped.set()
+
+    async def wait_stopped(self) -> None:
+        """Wait until the websocket stopped reconnecting, check auth_failed."""
+        await self._stopped.wait()
+
+    def _disconnected(self) -> None:
+        """Reset the per-connection state. Subscriptions are kept for replay."""
+        self._ws_id = -1
+        self._ha_authenticated.clear()
+        for waiter in self.ws_result_waiters.values():
+            if not waiter.done():
+                waiter.set_exception(ConnectionError("Websocket disconnected"))
+        self.subscription_ids.clear()
+        self.ws_queue_sizes.clear()
+        self.ws_result_waiters.clear()
+        self._deadlines.clear()
+        if self._deadline_timer:
+            self._deadline_timer.cancel()
+            self._deadline_timer = None
+        self.ws_event_handlers.clear()
+        workers = [eq.worker for eq in self.ws_event_queues.values()]
+        for worker in workers:
+            if worker:
+                worker.cancel()
+        self.running_tasks[:] = [
+            t for t in self.running_tasks if t not in workers and not t.done()
+        ]
+        self.ws_event_queues.clear()
 
     async def close(self) -> None:
         """Close the API session."""
         for task in self.running_tasks:
             task.cancel()
-        for waiter in self.ws_result_waiters.values():
-            if not waiter.done():
-                waiter.cancel()
-        self.ws_event_handlers.clear()
-        self.ws_result_waiters.clear()
-        self._ha_authenticated.clear()
         self.running_tasks.clear()
+        self._disconnected()
+        self.subscriptions.clear()
         await asyncio.sleep(0.1)  # Allow pending messages to be processed
-        await self.ses.close()
+        if ws := getattr(self, "_ws", None):  # the session may be shared
+            await ws.close()
+        await super().close()
 
     @property
     def connected(self) -> bool:
@@ -115,16 +228,16 @@ class HaWebsocketBase(HaApiBase):
         if message_as_dict:
             msg.update(message_as_dict)
         if not self.connected:
-            self.log_warn("Websocket is not connected %s", msg)
+            self.log_warn(f"Websocket is not connected {msg}")
             return None
         if "id" not in msg:
             self._ws_id += 1
             msg["id"] = self._ws_id
-        data = json.dumps(msg)
+        data = self.codec.dumps(msg)
         self.log_debug3("Sending websocket message: %s", data)
         if result_callback:
             self.ws_event_handlers[msg["id"]] = result_callback
-        await self._ws.send_str(data)
+        await self._ws.send_frame(data, WSMsgType.TEXT)
         return msg.get("id")
 
     async def handle_auth_required(self, msg: dict[str, Any]) -> None:
@@ -134,7 +247,8 @@ class HaWebsocketBase(HaApiBase):
     async def handle_auth_invalid(self, msg: dict[str, Any]) -> None:
         """Handle invalid authentication messages."""
         self.log_error("Websocket authentication failed. Closing connection.")
-        await self.close()
+        self.auth_failed = True  # the supervisor stops, see wait_stopped
+        await self._ws.close()
 
     async def handle_auth_ok(self, msg: dict[str, Any]) -> None:
         """Handle successful authentication messages."""
@@ -142,6 +256,17 @@ class HaWebsocketBase(HaApiBase):
             f"Websocket authentication successful [version {msg.get('ha_version')}]"
         )
         self._ws_id = 0  # auth_ok
+        self.connections += 1
+        # replay under new wire ids, the handles stay valid
+        for handle, (sub_msg, callback, queue_size) in self.subscriptions.items():
+            if (
+                msg_id := await self.send(sub_msg, result_callback=callback)
+            ) is not None:
+                self.subscription_ids[handle] = msg_id
+                if queue_size is not None:
+                    self.ws_queue_sizes[msg_id] = queue_size
+        if self.connections > 1 and self.subscriptions:
+            self.log_info(f"Resubscribed {len(self.subscriptions)} subscriptions")
         self._ha_authenticated.set()
 
     async def handle_event(self, msg: dict[str, Any]) -> None:
@@ -150,15 +275,48 @@ class HaWebsocketBase(HaApiBase):
         if not isinstance(m_id, int):
             self.log_error(f"Expect integer id, got {m_id}: {msg}")
 
-        if handler := self.ws_event_handlers.get(m_id):
-            handler = self.ws_event_handlers[m_id]
-            event = msg.get("event", {"no-result?": msg})
+        handler = self.ws_event_handlers.get(m_id)
+        if not handler:
+            self.log_warn(f"Unhandled websocket event id {m_id}: {msg}")
+            return
+
+        event = msg.get("event", {"no-result?": msg})
+        if self.event_queue_size <= 0:
             self.log_debug2(
                 "Running handler %s for id %s: %s", handler.__name__, m_id, event
             )
-            await self.ws_event_handlers[m_id](event)
-        else:
-            self.log_warn(f"Unhandled websocket event id {m_id}: {msg}")
+            await handler(event)
+            return
+
+        eq = self.ws_event_queues.get(m_id)
+        if eq is None:
+            size = self.ws_queue_sizes.get(m_id, self.event_queue_size)
+            eq = self.ws_event_queues[m_id] = EventQueue(queue=asyncio.Queue(size))
+            eq.worker = asyncio.create_task(self._event_worker(m_id, eq))
+            self.running_tasks.append(eq.worker)
+        if eq.queue.full():  # never block ws_loop, results & pongs must get through
+            eq.queue.get_nowait()
+            eq.dropped += 1
+            if eq.dropped == 1 or eq.dropped % 100 == 0:
+                self.log_warn(f"Event queue {m_id} full, dropped {eq.dropped} events")
+        eq.queue.put_nowait((time.monotonic(), event))
+
+    async def _event_worker(self, m_id: int, eq: EventQueue) -> None:
+        """Run the handler for each queued event of a subscription."""
+        while True:
+            received, event = await eq.queue.get()
+            eq.lag = time.monotonic() - received
+            if not (handler := self.ws_event_handlers.get(m_id)):
+                continue
+            self.log_debug2(
+                "Running handler %s for id %s: %s", handler.__name__, m_id, event
+            )
+            try:
+                await handler(event)
+            except Exception as e:
+                self.log_error(
+                    f"Error in handler {handler.__name__} for id {m_id}: {e}"
+                )
 
     async def handle_result(self, msg: dict[str, Any]) -> None:
         """Handle result messages.
@@ -173,6 +331,13 @@ class HaWebsocketBase(HaApiBase):
 
         if not msg.get("success", False):
             self.log_error(f"Error in websocket message: {msg}")
+            # a failed subscription will never receive events
+            self.ws_event_handlers.pop(m_id, None)
+            self.ws_queue_sizes.pop(m_id, None)
+            for handle, msg_id in list(self.subscription_ids.items()):
+                if msg_id == m_id:
+                    del self.subscription_ids[handle]
+                    self.subscriptions.pop(handle, None)
 
     async def request_result(
         self,
@@ -185,28 +350,72 @@ class HaWebsocketBase(HaApiBase):
         if message_as_dict:
             msg.update(message_as_dict)
         if not self.connected:
-            self.log_warn("Websocket is not connected %s", msg)
+            self.log_warn(f"Websocket is not connected {msg}")
             return None
 
         self._ws_id += 1
         msg_id = self._ws_id
         msg["id"] = msg_id
-        data = json.dumps(msg)
+        data = self.codec.dumps(msg)
 
         loop = asyncio.get_running_loop()
         waiter: asyncio.Future[dict[str, Any]] = loop.create_future()
         self.ws_result_waiters[msg_id] = waiter
+        self._add_deadline(loop.time() + timeout, msg_id)
 
         self.log_debug3("Sending websocket request-result message: %s", data)
-        await self._ws.send_str(data)
-
         try:
-            return await asyncio.wait_for(waiter, timeout=timeout)
+            await self._ws.send_frame(data, WSMsgType.TEXT)
+            return await waiter
         except TimeoutError:
-            self.log_error("Timeout waiting for websocket response to: %s", msg)
+            self.log_error(f"Timeout waiting for websocket response to: {msg}")
+            return None
+        except ConnectionError:
+            self.log_error(f"Websocket disconnected waiting for response to: {msg}")
             return None
         finally:
             self.ws_result_waiters.pop(msg_id, None)
+            waiter.cancel()  # e.g. the send failed
+
+    async def request_many(
+        self,
+        msgs: list[dict[str, Any]],
+        timeout: float = 10,  # noqa: ASYNC109
+    ) -> AsyncIterator[tuple[int, dict[str, Any] | None]]:
+        """Pipeline commands and yield (index, result) as the results arrive."""
+        tasks = {
+            asyncio.create_task(self.request_result(m, timeout=timeout)): idx
+            for idx, m in enumerate(msgs)
+        }
+        async for task in asyncio.as_completed(tasks):
+            yield tasks[task], task.result()  # type: ignore[index]
+
+    def _add_deadline(self, deadline: float, msg_id: int) -> None:
+        """Time out a result waiter, with one timer for all waiters."""
+        heapq.heappush(self._deadlines, (deadline, msg_id))
+        timer = self._deadline_timer
+        if timer is None or deadline < timer.when():
+            if timer:
+                timer.cancel()
+            self._deadline_timer = asyncio.get_running_loop().call_at(
+                deadline, self._expire_deadlines
+            )
+
+    def _expire_deadlines(self) -> None:
+        """Fail waiters past their deadline and re-arm the timer."""
+        # ponytail: answered requests stay in the heap until their deadline, costing
+        # one extra wakeup each at worst. Prune on set_result if that ever matters.
+        loop = asyncio.get_running_loop()
+        self._deadline_timer = None
+        while self._deadlines and self._deadlines[0][0] <= loop.time():
+            _, msg_id = heapq.heappop(self._deadlines)
+            waiter = self.ws_result_waiters.get(msg_id)
+            if waiter and not waiter.done():
+                waiter.set_exception(TimeoutError())
+        if self._deadlines:
+            self._deadline_timer = loop.call_at(
+                self._deadlines[0][0], self._expire_deadlines
+            )
 
     async def ws_loop(self) -> None:
         """Connect to Websocket.
@@ -220,7 +429,7 @@ class HaWebsocketBase(HaApiBase):
         )
         self.log_info(f"Connecting to websocket: {url}")
         self._ws_id = -1  # no auth
-        async with self.ses.ws_connect(url) as __ws:
+        async with self.ses.ws_connect(url, decode_text=False) as __ws:
             self._ws = __ws
             self.log_debug("connected")
             try:
@@ -236,7 +445,7 @@ class HaWebsocketBase(HaApiBase):
                             f"Received message of unknown type: {msg.type} {msg.data}"
                         )
 
-                    data = json.loads(msg.data)
+                    data = self.codec.loads(msg.data)
 
                     m_type = cast(str, data.get("type", ""))
                     if handler := self.ws_msg_handlers.get(m_type):
@@ -251,8 +460,6 @@ class HaWebsocketBase(HaApiBase):
                         self.log_warn(f"Unhandled message type: {m_type} {data}")
             except Exception as e:
                 self.log_error(f"Error handling websocket messages: {e}")
-            finally:
-                await self.close()
             self.log_warn("Websocket connection closed")
 
     def ping(self, count: int = -1, interval: int = 10) -> None:
@@ -277,9 +484,8 @@ class HaWebsocketBase(HaApiBase):
                         if count == 0:
                             break
                     await asyncio.sleep(interval)
-                    if not self.connected:
-                        break
-                    await self.send(type="ping")
+                    if self.connected:  # skip while reconnecting
+                        await self.send(type="ping")
             except Exception as e:
                 self.log_error(f"Error sending ping: {e}")
             finally:
@@ -348,31 +554,71 @@ class HaWebsocketBase(HaApiBase):
             else:
                 result_callback(result, *param)
 
-        res = await self.send(
-            type="render_template",
-            template=template,
-            report_errors=report_errors,
-            result_callback=_cb,
+        return await self.subscribe(
+            {
+                "type": "render_template",
+                "template": template,
+                "report_errors": report_errors,
+            },
+            _cb,
         )
-        return res
+
+    async def subscribe(
+        self,
+        msg: dict[str, Any],
+        callback: MsgCallback,
+        queue_size: int | None = None,
+    ) -> int | None:
+        """Send a subscription message, remember it to replay on reconnect.
+
+        Return a handle for unsubscribe_events. Unlike the wire id, the handle
+        stays the same when the subscription is replayed after a reconnect.
+
+        queue_size overrides event_queue_size. 0 queues without a limit, for
+        streams that must not lose events, like the ones feeding the state mirror.
+        """
+        msg_id = await self.send(msg, result_callback=callback)
+        if msg_id is None:
+            return None
+        self._sub_handle += 1
+        self.subscriptions[self._sub_handle] = (msg, callback, queue_size)
+        self.subscription_ids[self._sub_handle] = msg_id
+        if queue_size is not None:
+            self.ws_queue_sizes[msg_id] = queue_size
+        return self._sub_handle
 
     async def subscribe_events(
-        self, event_type: str | None, callback: MsgCallback
+        self,
+        event_type: str | None,
+        callback: MsgCallback,
+        queue_size: int | None = None,
     ) -> int | None:
         """Subscribe to websocket events."""
         msg = {"event_type": event_type} if event_type is not None else {}
-        return await self.send(msg, type="subscribe_events", callback=callback)
+        return await self.subscribe(
+            {"type": "subscribe_events", **msg}, callback, queue_size
+        )
 
     async def subscribe_triggers(
-        self, trigger: dict[str, Any] | list[dict[str, Any]], callback: MsgCallback
+        self,
+        trigger: dict[str, Any] | list[dict[str, Any]],
+        callback: MsgCallback,
+        queue_size: int | None = None,
     ) -> int | None:
         """Subscribe to websocket triggers."""
-        return await self.send(
-            type="subscribe_trigger", trigger=trigger, result_callback=callback
+        return await self.subscribe(
+            {"type": "subscribe_trigger", "trigger": trigger}, callback, queue_size
         )
 
-    async def unsubscribe_events(self, event_id: int) -> None:
-        """Unsubscribe from websocket events."""
+    async def unsubscribe_events(self, handle: int) -> None:
+        """Unsubscribe, using the handle returned by subscribe."""
+        self.subscriptions.pop(handle, None)
+        if (event_id := self.subscription_ids.pop(handle, None)) is None:
+            return  # not subscribed on this connection
+        self.ws_event_handlers.pop(event_id, None)
+        self.ws_queue_sizes.pop(event_id, None)
+        if (eq := self.ws_event_queues.pop(event_id, None)) and eq.worker:
+            eq.worker.cancel()
         await self.send(type="unsubscribe_events", event_id=event_id)
 
 
@@ -380,17 +626,172 @@ class HaWebsocketBase(HaApiBase):
 class HaWebsocketApi(HaWebsocketBase):
     """Home Assistant Websocket API wrapper."""
 
-    async def get_entity_registry(self) -> list[HAEntity]:
-        """Get entity registry entries via websocket API."""
+    states: dict[str, HAState] = field(default_factory=dict, init=False, repr=False)
+    """Entity state mirror, kept current by subscribe_entities."""
+    on_resync: StatesCallback | None = field(default=None, init=False, repr=False)
+    """Receives the states that changed while disconnected, see resync_states."""
+
+    async def handle_auth_ok(self, msg: dict[str, Any]) -> None:
+        """Replay the subscriptions, and resync the state mirror after a reconnect."""
+        before = dict(self.states)
+        await super().handle_auth_ok(msg)
+        if self.connections > 1 and before:
+            # ws_loop runs this handler and delivers the result, so do not wait here
+            self.running_tasks.append(asyncio.create_task(self.resync_states(before)))
+
+    async def resync_states(self, before: dict[str, HAState]) -> None:
+        """Reload the state mirror, pass the states changed since `before` on."""
+        if not await self.get_states():
+            return
+        changed = [
+            st
+            for eid, st in self.states.items()
+            if not (old := before.get(eid))
+            or (old.state, old.attributes) != (st.state, st.attributes)
+        ]
+        self.log_info(f"Resynced the state mirror, {len(changed)} states changed")
+        if changed and self.on_resync:
+            await self.on_resync(changed)
+
+    async def get_state(self, entity_id: str) -> HAState | None:
+        """Get an entity state from the state mirror."""
+        return self.states.get(entity_id)
+
+    async def get_states(self) -> list[HAState]:
+        """Get all states via websocket API and seed the state mirror."""
+        res = await self.request_result(type="get_states")
+        if not res or not res.get("success"):
+            return []
+        states = structure_list(HAState, res.get("result") or [])
+        self.states.clear()
+        self.states.update((s.entity_id, s) for s in states)
+        return states
+
+    async def subscribe_entities(
+        self, entity_ids: list[str] | None = None, callback: MsgCallback | None = None
+    ) -> int | None:
+        """Keep the state mirror current with the compressed entity stream.
+
+        The optional callback receives each event after the mirror was updated.
+        """
+        msg = {"entity_ids": entity_ids} if entity_ids else {}
+        connection = self.connections
+
+        async def _cb(event: dict[str, Any]) -> None:
+            nonlocal connection
+            if connection != self.connections and "a" in event:
+                # the first event after a replay adds every current state
+                connection = self.connections
+                gone = set(entity_ids or self.states) - event["a"].keys()
+                for eid in gone:
+                    self.states.pop(eid, None)
+            await self.handle_entities(event)
+            if callback:
+                await callback(event)
+
+        return await self.subscribe(
+            {"type": "subscribe_entities", **msg}, _cb, queue_size=0
+        )
+
+    def set_state(self, entity_id: str, state: dict[str, Any] | None) -> HAState | None:
+        """Update the state mirror from a full state, e.g. a state_changed new_state."""
+        if state is None:
+            self.states.pop(entity_id, None)
+            return None
+        self.states[entity_id] = st = structure_list(HAState, [state])[0]
+        return st
+
+    async def handle_entities(self, event: dict[str, Any]) -> None:
+        """Apply a subscribe_entities event: a=added, c=changed, r=removed."""
+        for eid, cst in event.get("a", {}).items():
+            self.states[eid] = st = HAState(entity_id=eid, state="")
+            _apply_compressed(st, cst)
+        for eid, diff in event.get("c", {}).items():
+            if (st := self.states.get(eid)) is None:
+                continue
+            _apply_compressed(st, diff.get("+", {}))
+            for key in diff.get("-", {}).get("a", ()):
+                st.attributes.pop(key, None)
+        for eid in event.get("r", ()):
+            self.states.pop(eid, None)
+
+    async def get_entity_registry(
+        self, label: str | None = None, platform: str | None = None
+    ) -> list[HAEntity]:
+        """Get entity registry entries via websocket API.
+
+        With a label, HA returns only the entities related to it. This includes all
+        labelled entities, but may include some others. If HA cannot search, the
+        labelled entities of the platform are found in the compact display registry.
+        """
+        if label:
+            eids = await self.get_label_entities(label)
+            if eids is None and (short := await self.get_entity_registry_display()):
+                eids = [
+                    e.ei for e in short if label in e.lb and platform in (None, e.pl)
+                ]
+            if (
+                eids is not None
+                and (entries := await self.get_entity_registry_entries(eids))
+                is not None
+            ):
+                return entries
+
         res = await self.request_result(type="config/entity_registry/list")
         if not res or not res.get("success"):
             return []
 
         payload = res.get("result", [])
-        _LOG.info(payload[0])
         if not isinstance(payload, list):
             return []
-        return CONVERTER.structure(payload, list[HAEntity])
+        return structure_list(HAEntity, payload)
+
+    async def get_entity_registry_display(self) -> list[HAEntityShort]:
+        """Get the compact entity registry, as used by the HA frontend."""
+        res = await self.request_result(type="config/entity_registry/list_for_display")
+        if not res or not res.get("success"):
+            return []
+        return structure_list(HAEntityShort, res["result"].get("entities", []))
+
+    async def get_entity_registry_entries(
+        self, entity_ids: list[str]
+    ) -> list[HAEntity] | None:
+        """Get the registry entries of some entities, None on failure."""
+        res = await self.request_result(
+            type="config/entity_registry/get_entries", entity_ids=entity_ids
+        )
+        if not res or not res.get("success"):
+            return None
+        return structure_list(HAEntity, [e for e in res["result"].values() if e])
+
+    async def get_label_entities(self, label_id: str) -> list[str] | None:
+        """Get the entity ids related to a label, None if HA cannot search."""
+        res = await self.request_result(
+            type="search/related", item_type="label", item_id=label_id
+        )
+        if not res or not res.get("success"):
+            return None
+        return res["result"].get("entity", [])
+
+
+def _apply_compressed(st: HAState, cst: dict[str, Any]) -> None:
+    """Update a state from the compressed subscribe_entities format."""
+    if "s" in cst:
+        st.state = cst["s"]
+    if "a" in cst:
+        st.attributes.update(cst["a"])
+    if "c" in cst:
+        ctx = cst["c"]
+        st.context = ctx if isinstance(ctx, dict) else {"id": ctx}
+    if "lc" in cst:
+        st.last_changed = st.last_updated = _isotime(cst["lc"])
+    if "lu" in cst:
+        st.last_updated = _isotime(cst["lu"])
+
+
+def _isotime(timestamp: float) -> str:
+    """Convert a compressed timestamp to the REST API ISO format."""
+    return datetime.fromtimestamp(timestamp, UTC).isoformat()
 
 
 def isStrCallback(
@@ -0,0 +1,61 @@
+"""Shared aiohttp client sessions."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from weakref import WeakKeyDictionary
+
+from aiohttp import ClientSession, TCPConnector
+
+
+@dataclass
+class SessionFactory:
+    """One pooled, keep-alive ClientSession per event loop, shared by all clients.
+
+    Configure before the first get(). The factory owns the sessions: clients must
+    not close them, the add-on calls close() on shutdown.
+    """
+
+    limit: int = 100
+    """Total connections in the pool."""
+    limit_per_host: int = 10
+    """Connections per host in the pool."""
+    keepalive_timeout: float = 60
+    """Seconds to keep an idle connection open."""
+    ttl_dns_cache: int = 300
+    """Seconds to cache DNS lookups."""
+    # ponytail: aiohttp speaks HTTP/1.1 only. Keep-alive gives the reuse that
+    # matters for a handful of hosts, HTTP/2 would need another HTTP client.
+
+    _sessions: WeakKeyDictionary[asyncio.AbstractEventLoop, ClientSession] = field(
+        default_factory=WeakKeyDictionary, init=False, repr=False
+    )
+
+    def get(self) -> ClientSession:
+        """Get the session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        ses = self._sessions.get(loop)
+        if ses is None or ses.closed:
+            ses = self._sessions[loop] = ClientSession(
+                connector=TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                )
+            )
+        return ses
+
+    def owns(self, ses: ClientSession) -> bool:
+        """Check if the session is a shared session."""
+        return ses in self._sessions.values()
+
+    async def close(self) -> None:
+        """Close the session of the running event loop."""
+        if ses := self._sessions.pop(asyncio.get_running_loop(), None):
+            await ses.close()
+
+
+SESSIONS = SessionFactory()
+"""The shared session factory."""
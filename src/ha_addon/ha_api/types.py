@@ -1,6 +1,6 @@
 """HA API types."""
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Any
 
 
@@ -32,7 +32,7 @@ class HAService:
     service: list[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class HAState:
     """Response from a call_service request.
 
@@ -54,7 +54,7 @@ class HAState:
     last_updated: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class HAEntityShort:
     """Entity from the Entity Register (for display).
 
@@ -88,11 +88,11 @@ class HAEntityShort:
     """Entity ID."""
     pl: str
     """Platform."""
-    ai: str
+    ai: str = ""
     """Area ID."""
-    di: str
+    di: str = ""
     """Device ID."""
-    en: str
+    en: str = ""
     """Entity name."""
     lb: list[str] = field(default_factory=list)
     """Labels."""
@@ -108,7 +108,7 @@ class HAEntityShort:
     """Display precision."""
 
 
-@dataclass
+@dataclass(slots=True)
 class HAEntity:
     """Entity from the Entity Register.
 
@@ -119,7 +119,7 @@ class HAEntity:
     """Entity ID."""
     platform: str
     """Platform."""
-    area_id: str
+    area_id: str = ""
     """Area ID."""
     categories: dict[str, str] = field(default_factory=dict)
     """Categories."""
@@ -150,3 +150,16 @@ class HAEntity:
     id: str = ""
     disabled_by: str = ""
     options: dict[str, Any] = field(default_factory=dict)
+
+
+def structure_list[T](cls: type[T], rows: list[dict[str, Any]]) -> list[T]:
+    """Build API types from decoded JSON rows.
+
+    Faster than CONVERTER.structure: unknown keys and None values are skipped, and
+    values are used as is (the attributes dicts are not copied).
+    """
+    names = frozenset(f.name for f in fields(cls))  # type: ignore[arg-type]
+    return [
+        cls(**{k: v for k, v in row.items() if v is not None and k in names})
+        for row in rows
+    ]
@@ -1,6 +1,13 @@
 """Helpers."""
 
+import asyncio
+import hashlib
+import json
 import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
 
 _LOG = logging.getLogger(__name__)
 
@@ -21,3 +28,47 @@ def onoff(state: str | bool | int | None) -> str | None:
         return "on"
     # _LOG.warning("Unknown state %s, defaulting to off", state)
     return None
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write a file atomically: a crash leaves either the old or the new file."""
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(path)
+
+
+@dataclass
+class JsonStore:
+    """A compact JSON file, read and written in a thread.
+
+    Unchanged content is not written again.
+    """
+
+    path: Path
+    writes: int = 0
+    """Number of files written."""
+    _hash: bytes = field(default=b"", init=False, repr=False)
+
+    async def load(self) -> Any:
+        """Load the file, None if it does not exist."""
+        try:
+            raw = await asyncio.to_thread(self.path.read_bytes)
+        except FileNotFoundError:
+            return None
+        self._hash = hashlib.blake2b(raw, digest_size=16).digest()
+        return json.loads(raw)
+
+    async def save(self, data: Any) -> bool:
+        """Save the data, return False if the content is unchanged."""
+        raw = json.dumps(data, separators=(",", ":")).encode()
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+        if digest == self._hash:
+            return False
+        await asyncio.to_thread(write_atomic, self.path, raw)
+        self._hash = digest
+        self.writes += 1
+        return True
@@ -19,7 +19,7 @@ async def main_loop() -> int:
 
     OPT_FILE.load_file()
 
-    STATE.cgs = [CGroupBridge(opt=g) for g in API.opt.groups]
+    STATE.set_groups([CGroupBridge(opt=g) for g in API.opt.groups])
 
     await API.connect_rest_ws()
     # for cg in STATE.cgs:
@@ -27,26 +27,18 @@ async def main_loop() -> int:
     await STATE.websocket_on_connect()  # register templates
 
     await STATE.connect_mqtt()
+    await STATE.subscribe_registry()  # needs the MQTT device
 
+    forever = asyncio.create_task(STATE.run_forever())
     try:
-        while True:
-            try:
-                await asyncio.sleep(0.2)
-
-                if not API.ws.connected:
-                    await asyncio.sleep(2)
-                    _LOG.info("Websocket not connected, reconnecting...")
-                    await API.connect_rest_ws()
-                    await STATE.websocket_on_connect()
-
-                await STATE.run_loop()
-
-            except asyncio.CancelledError:
-                _LOG.info("Shutting down cgroup sensors")
-                break
-            except Exception as ex:
-                _LOG.error("Error in main loop: %s", ex, exc_info=True)
+        await API.ws.wait_stopped()  # reconnects itself, unless the token is bad
+        _LOG.error("The HA websocket stopped (auth failed=%s)", API.ws.auth_failed)
+        return 1
+    except asyncio.CancelledError:
+        _LOG.info("Shutting down cgroup sensors")
     finally:
+        forever.cancel()
+        await OPT_FILE.flush()
         await API.close()
 
     return 0
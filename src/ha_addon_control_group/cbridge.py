@@ -5,20 +5,47 @@ from __future__ import annotations
 import asyncio
 import logging
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Literal
 
 from mqtt_entity import MQTTClient, MQTTDevice, MQTTSelectEntity, MQTTSensorEntity
 from mqtt_entity.utils import slug
 
+from ha_addon.ha_api.types import HAState
 from ha_addon.helpers import onoff
 
-from .options import API
-from .options_discover import ControlGroupOptions
+from .options import API, check_group_ids
+from .options_discover import ControlGroupOptions, is_group_helper, load_group
 from .options_file import OPT_FILE, FileGroupOption
 
 _LOG = logging.getLogger(__name__)
 ACHANGE = asyncio.Event()
 
+type Strategy = Literal["trigger", "entities", "events"]
+TRIGGER_SHARD = 250
+"""Entities per subscribe_trigger call."""
+TRIGGER_MAX = 1000
+"""Above this, let subscribe_entities route instead of HA state triggers."""
+REDISCOVER_DELAY = 2
+"""Seconds to collect registry changes before rediscovering."""
+
+
+def plan_subscription(count: int, total: int) -> Strategy:
+    """Choose how to watch `count` of the `total` HA entities.
+
+    - trigger: HA filters per entity, only matching changes arrive.
+    - entities: one filtered subscription, shared with the state mirror.
+    - events: every state change arrives and is filtered locally. Cheapest for HA
+      when most entities are watched anyway.
+
+    Each strategy opens one stream, trigger & events also update the mirror.
+    """
+    # ponytail: fixed thresholds from test_subscription_strategies, not adaptive
+    if total and count * 2 >= total:
+        return "events"
+    if count <= TRIGGER_MAX:
+        return "trigger"
+    return "entities"
+
 
 @dataclass
 class AddonState:
@@ -29,6 +56,26 @@ class AddonState:
     dev: MQTTDevice = field(init=False)
     debug_sensor: MQTTSensorEntity = field(init=False)
     debug_sensor_state: str = ""
+    wakeups: int = 0
+    """Main loop iterations."""
+    sources: dict[str, list[CGroupBridge]] = field(default_factory=dict)
+    """Groups by source entity."""
+    targets: dict[str, list[CGroupBridge]] = field(default_factory=dict)
+    """Groups by target entity."""
+    sub_ids: list[int | None] = field(default_factory=list)
+    """Change subscriptions, see subscribe_changes."""
+    _rediscover: set[str] = field(default_factory=set, init=False, repr=False)
+    _rediscover_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def set_groups(self, cgs: list[CGroupBridge]) -> None:
+        """Set the groups and rebuild the entity index."""
+        self.cgs = cgs
+        self.sources.clear()
+        self.targets.clear()
+        for cg in cgs:
+            self.sources.setdefault(cg.opt.src_entity, []).append(cg)
+            for eid in set(cg.opt.entities) - {cg.opt.src_entity}:
+                self.targets.setdefault(eid, []).append(cg)
 
     async def connect_mqtt(self) -> None:
         """Init MQTT entities and connect."""
@@ -73,26 +120,206 @@ class AddonState:
         for cg in self.cgs:
             await cg.register_ws()
 
-        entities = list[str]()
-        for cg in self.cgs:
-            entities.extend(cg.opt.entities)
-            entities.append(cg.opt.src_entity)
-        triggers = [{"platform": "state", "entity_id": e} for e in set(entities)]
-
-        async def _cb(msg: dict[str, Any]) -> None:
-            eid = msg["variables"]["trigger"]["entity_id"]
-            state = msg["variables"]["trigger"]["to_state"]["state"]
-            for cg in self.cgs:
-                if eid == cg.opt.src_entity:
-                    await cg.on_render(state, msg)
-                    continue
-                if state == cg.state:
-                    continue
-                if eid in cg.opt.entities:
-                    _LOG.info("CG %s: Reset %s to %s", cg.opt.id, eid, cg.state)
-                    await API.rest.set_entity_state(eid, cg.state or "off")
-
-        await API.ws.subscribe_triggers(trigger=triggers, callback=_cb)
+        await API.ws.get_states()  # seed the state mirror
+        API.ws.on_resync = self.resynced
+        await self.subscribe_changes()
+
+    async def resynced(self, changed: list[HAState]) -> None:
+        """Route the changes missed while the websocket was disconnected."""
+        for st in changed:
+            if st.entity_id in self.sources or st.entity_id in self.targets:
+                await self.route(st.entity_id, st.state, {})
+
+    async def subscribe_changes(self, strategy: Strategy | None = None) -> Strategy:
+        """Subscribe to state changes of the group entities, see plan_subscription."""
+        entities = list(self.sources.keys() | self.targets.keys())
+        strategy = strategy or plan_subscription(len(entities), len(API.ws.states))
+        _LOG.info("Watching %s entities with %s", len(entities), strategy)
+
+        if strategy == "entities":  # the state mirror stream routes the changes
+
+            async def _ent_cb(event: dict[str, Any]) -> None:
+                for eid in event.get("c", {}):  # incl. attribute-only changes
+                    if st := API.ws.states.get(eid):
+                        await self.route(eid, st.state, event)
+
+            self.sub_ids.append(await API.ws.subscribe_entities(entities, _ent_cb))
+            return strategy
+
+        async def _changed(
+            eid: str, new_state: dict[str, Any] | None, msg: Any
+        ) -> None:
+            if st := API.ws.set_state(eid, new_state):
+                await self.route(eid, st.state, msg)
+
+        if strategy == "events":
+
+            async def _evt_cb(event: dict[str, Any]) -> None:
+                data = event["data"]
+                eid = data["entity_id"]
+                if eid in self.sources or eid in self.targets:
+                    await _changed(eid, data["new_state"], event)
+
+            self.sub_ids.append(  # feeds the mirror, never drop events
+                await API.ws.subscribe_events("state_changed", _evt_cb, queue_size=0)
+            )
+            return strategy
+
+        async def _trg_cb(msg: dict[str, Any]) -> None:
+            trigger = msg["variables"]["trigger"]
+            await _changed(trigger["entity_id"], trigger["to_state"], msg)
+
+        for idx in range(0, len(entities), TRIGGER_SHARD):
+            shard = entities[idx : idx + TRIGGER_SHARD]
+            self.sub_ids.append(
+                await API.ws.subscribe_triggers(
+                    trigger={"platform": "state", "entity_id": shard},
+                    callback=_trg_cb,
+                    queue_size=0,
+                )
+            )
+        return strategy
+
+    async def resubscribe_changes(self) -> None:
+        """Replace the change subscriptions after the groups changed."""
+        for sub_id in self.sub_ids:
+            if sub_id is not None:
+                await API.ws.unsubscribe_events(sub_id)
+        self.sub_ids.clear()
+        await self.subscribe_changes()
+
+    async def subscribe_registry(self) -> None:
+        """Rediscover the groups of helpers changed in the entity registry or config entries."""
+
+        async def _reg_cb(event: dict[str, Any]) -> None:
+            data = event["data"]
+            old_eid = data.get("changes", {}).get("entity_id")  # renamed
+            self.rediscover({data["entity_id"], old_eid or data["entity_id"]})
+
+        async def _entry_cb(changes: list[dict[str, Any]]) -> None:
+            entry_ids = {c["entry"]["entry_id"] for c in changes if c.get("type")}
+            self.rediscover(
+                {
+                    cg.opt.src_entity
+                    for cg in self.cgs
+                    if cg.opt.config_entry_id in entry_ids
+                }
+            )
+
+        await API.ws.subscribe_events("entity_registry_updated", _reg_cb)
+        await API.ws.subscribe(
+            {"type": "config_entries/subscribe", "type_filter": ["helper"]},
+            _entry_cb,  # type: ignore[arg-type]
+        )
+
+    def rediscover(self, entity_ids: set[str]) -> None:
+        """Queue helpers for rediscovery, handled together after a short delay."""
+        self._rediscover.update(e for e in entity_ids if e.startswith("sensor."))
+        if self._rediscover and self._rediscover_task is None:
+            self._rediscover_task = asyncio.create_task(self._rediscover_later())
+
+    async def _rediscover_later(self) -> None:
+        """Rediscover after the delay, registry changes tend to come in bursts.
+
+        Changes queued while rediscovering wait for the next round, so two
+        rediscoveries never interleave their subscription changes.
+        """
+        try:
+            while self._rediscover:
+                await asyncio.sleep(REDISCOVER_DELAY)
+                eids, self._rediscover = self._rediscover, set()
+                try:
+                    await self.rediscover_groups(eids)
+                except Exception as ex:
+                    _LOG.error("Rediscovery of %s failed: %s", eids, ex, exc_info=True)
+        finally:
+            self._rediscover_task = None
+
+    async def rediscover_groups(self, entity_ids: set[str]) -> None:
+        """Add, update or remove the groups defined by these helpers."""
+        API.rest.cache_clear()  # templates may have changed
+        regs = await API.ws.get_entity_registry_entries(list(entity_ids)) or []
+        helpers = {r.entity_id: r for r in regs if is_group_helper(r)}
+        old = {
+            cg.opt.src_entity: cg for cg in self.cgs if cg.opt.src_entity in entity_ids
+        }
+
+        new = list[ControlGroupOptions]()
+        states = dict[str, str]()  # the mirror only has the watched entities
+        for eid, reg in helpers.items():
+            state = await API.rest.get_state(eid)
+            if state and (group := await load_group(API, reg, state)):
+                new.append(group)
+                states[eid] = state.state
+
+        keep = [cg for cg in self.cgs if cg.opt.src_entity not in entity_ids]
+        added = list[CGroupBridge]()
+        for group in new:
+            if (cg := old.get(group.src_entity)) and cg.opt == group:
+                keep.append(old.pop(group.src_entity))  # unchanged
+                continue
+            try:
+                check_group_ids([c.opt.id for c in keep + added] + [group.id])
+            except ValueError as err:
+                _LOG.error("Skipping group from %s: %s", group.src_entity, err)
+                continue
+            if (cg := old.get(group.src_entity)) and cg.opt.id == group.id:
+                old.pop(group.src_entity)  # updated, same mode entity
+            added.append(CGroupBridge(opt=group))
+        if not added and not old:
+            return
+
+        _LOG.info(
+            "Rediscovered groups: added/updated %s, removed %s",
+            [cg.opt.id for cg in added],
+            [cg.opt.id for cg in old.values()],
+        )
+        for cg in old.values():
+            cg.unregister_mqtt(self.dev)
+        for cg in added:
+            cg.register_mqtt(self.dev)
+        self.set_groups(sorted(keep + added, key=lambda cg: cg.opt.id))
+        if stale := OPT_FILE.groups.keys() - {cg.opt.id for cg in self.cgs}:
+            for gid in stale:
+                del OPT_FILE.groups[gid]
+            OPT_FILE.save_file()
+        await self.seed_states(added)
+        await self.resubscribe_changes()
+        await API.mqtt.publish_discovery_info()
+        for cg in added:
+            await cg.mode_entity.send_state(API.mqtt, cg.file_opt.mode)
+            await cg.on_render(states[cg.opt.src_entity], msg={})
+        ACHANGE.set()
+
+    async def seed_states(self, cgs: list[CGroupBridge]) -> None:
+        """Add the missing group entities to the mirror, seeded at startup."""
+        missing = {e for cg in cgs for e in cg.opt.entities} - API.ws.states.keys()
+        for st in await asyncio.gather(*(API.rest.get_state(e) for e in missing)):
+            if st:
+                API.ws.states[st.entity_id] = st
+
+    async def route(self, eid: str, state: str, msg: dict[str, Any]) -> None:
+        """Route a state change to the groups using the entity."""
+        todo = [cg.on_render(state, msg) for cg in self.sources.get(eid, ())]
+        for cg in self.targets.get(eid, ()):
+            if state != cg.state:
+                _LOG.info("CG %s: Reset %s to %s", cg.opt.id, eid, cg.state)
+                API.writes.set_entity_state(eid, cg.state or "off")
+        await asyncio.gather(*todo)
+
+    async def run_forever(self) -> None:
+        """Run the main loop, waking only when a group changed.
+
+        The websocket reconnects itself and cancellation stops the loop, so there
+        is nothing to poll for.
+        """
+        while True:
+            await ACHANGE.wait()
+            self.wakeups += 1
+            try:
+                await self.run_loop()
+            except Exception as ex:
+                _LOG.error("Error in main loop: %s", ex, exc_info=True)
 
     async def run_loop(self) -> None:
         """Run the main loop."""
@@ -187,21 +414,18 @@ class CGroupBridge:
                 return
 
         # sync the state
-        current_state = [await API.rest.get_state(e) for e in self.opt.entities]
-        diff = [s for s in current_state if s and s.state != self.state]
+        current_state = [await API.ws.get_state(e) for e in self.opt.entities]
+        diff = [s.entity_id for s in current_state if s and s.state != self.state]
         if diff:
-            ents = ",".join(s.entity_id for s in diff)
-            _LOG.info("CG %s: set %s=%s", self.opt.id, ents, self.state)
-
-        # set the values
-        for st in diff:
-            await API.rest.set_entity_state(st.entity_id, self.state)
+            _LOG.info("CG %s: set %s=%s", self.opt.id, ",".join(diff), self.state)
+        for eid in diff:
+            API.writes.set_entity_state(eid, self.state)
         # _LOG.info("CG %s: listeners %s", self.opt.id, msg.get("listeners"))
         ACHANGE.set()
 
     async def render_template(self) -> None:
-        """Render template with REST API."""
-        state = await API.rest.get_state(self.opt.src_entity)
+        """Render template from the websocket state mirror."""
+        state = await API.ws.get_state(self.opt.src_entity)
         if state:
             return await self.on_render(state.state, msg={})
         self.state_reason = "Source entity state not found"
@@ -239,8 +463,15 @@ class CGroupBridge:
         await self.mode_entity.send_state(API.mqtt, payload)
         await self.render_template()
 
+    def unregister_mqtt(self, mq_dev: MQTTDevice) -> None:
+        """Remove the mode entity, on the next publish_discovery_info."""
+        mq_dev.components.pop(self.opt.id, None)
+        mq_dev.remove_components[self.opt.id] = "select"
+        API.mqtt.topic_unsubscribe(self.mode_entity.command_topic)
+
     def register_mqtt(self, mq_dev: MQTTDevice) -> None:
         """Register the control group with the MQTT broker."""
+        mq_dev.remove_components.pop(self.opt.id, None)
 
         async def _cb(msg: str, _: str) -> None:
             await self.on_command_state(msg)
@@ -23,6 +23,7 @@ class Options(MQTTOptions):
     ha_prefix: str = "cgroup"
     ha_api_url: str = ""
     ha_api_token: str = ""
+    ha_api_max_parallel: int = 8
     debug: int = 0
 
     def __post_init__(self) -> None:
@@ -34,19 +35,21 @@ class Options(MQTTOptions):
     async def discover_groups(self) -> None:
         """Discover groups."""
         self.groups = await discover_control_groups(API)
+        check_group_ids([g.id for g in self.groups])
+        self.groups.sort(key=lambda g: g.id)
 
-        ids = [g.id for g in self.groups]
-        if "" in ids:  # check empty IDs
-            raise ValueError("Groups need a unique ID. Fix your config.")
-        for r_id in ("status", "debug"):  # check for reserved IDs
-            if r_id in ids:
-                raise ValueError(f"Group ID '{r_id}' reserved. Fix your config.")
-        if len(ids) != len(set(ids)):  # check duplicate IDs
-            for aid in set(ids):
-                ids.remove(aid)
-            raise ValueError(f"Duplicate group IDs found: {ids}")
 
-        self.groups.sort(key=lambda g: g.id)
+def check_group_ids(ids: list[str]) -> None:
+    """Check for empty, reserved and duplicate group IDs."""
+    if "" in ids:  # check empty IDs
+        raise ValueError("Groups need a unique ID. Fix your config.")
+    for r_id in ("status", "debug"):  # check for reserved IDs
+        if r_id in ids:
+            raise ValueError(f"Group ID '{r_id}' reserved. Fix your config.")
+    if len(ids) != len(set(ids)):  # check duplicate IDs
+        for aid in set(ids):
+            ids.remove(aid)
+        raise ValueError(f"Duplicate group IDs found: {ids}")
 
 
 API = HaAllApis[Options]()
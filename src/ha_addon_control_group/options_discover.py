@@ -1,13 +1,16 @@
 """Control group discovery from Home Assistant helper metadata."""
 
+import asyncio
 import logging
+import time
 from dataclasses import dataclass, field
 from typing import Any
 
 from mqtt_entity.utils import slug
 
 from ha_addon.all_apis import HaAllApis
-from ha_addon.ha_api.types import HAState
+from ha_addon.ha_api.ha_rest import CACHE_TTL
+from ha_addon.ha_api.types import HAEntity, HAState
 
 _LOG = logging.getLogger(__name__)
 
@@ -22,6 +25,7 @@ class ControlGroupOptions:
     entities: list[str] = field(default_factory=list)
     template: str = ""
     call_script: str = ""
+    config_entry_id: str = ""
 
     def __post_init__(self) -> None:
         """Init."""
@@ -30,58 +34,79 @@ class ControlGroupOptions:
             raise ValueError("Group ID cannot be empty.")
 
 
+TAG = "control_group"
+"""Label of the template sensor helpers that define control groups."""
+
+
+def is_group_helper(reg: HAEntity, tag: str = TAG) -> bool:
+    """Check if the registry entry is a tagged template sensor helper."""
+    return (
+        reg.entity_id.startswith("sensor.")
+        and reg.platform == "template"
+        and tag in reg.labels
+    )
+
+
+async def load_group(
+    api: HaAllApis[Any], reg: HAEntity, state: HAState
+) -> ControlGroupOptions | None:
+    """Load a control group from a helper, including its template."""
+    group = _to_group(state)
+    if not group:
+        _LOG.warning("Skipping helper with invalid entity id: %s", reg.entity_id)
+        return None
+    group.config_entry_id = reg.config_entry_id
+    group.template = await api.rest.get_config_entry_template(reg.config_entry_id)
+    _LOG.debug("CG %s: template %s", group.id, group.template)
+    if not group.entities:
+        _LOG.warning(
+            "Helper '%s' has no target entities (expected attribute like entities/control_group_entities).",
+            reg.entity_id,
+        )
+    return group
+
+
 async def discover_control_groups(
     api: HaAllApis[Any],
     *,
-    tag: str = "control_group",
+    tag: str = TAG,
 ) -> list[ControlGroupOptions]:
     """Discover control groups from tagged template sensor helpers."""
+    start = time.perf_counter()
     await api.connect_rest_ws()
+    api.rest.cache_ttl.update(CACHE_TTL)  # templates are fetched on every discovery
+    timing = {"connect": time.perf_counter() - start}
 
-    states = await api.rest.get_states()
-    registry = await api.ws.get_entity_registry()
-
-    _LOG.error(
-        [
-            (t.entity_id, t.platform, t.labels)
-            for t in registry
-            if t.platform == "template"
-        ]
+    states, registry = await asyncio.gather(
+        api.rest.get_states(),
+        api.ws.get_entity_registry(label=tag, platform="template"),
     )
+    timing["states+registry"] = time.perf_counter() - start - sum(timing.values())
 
-    registry_map = {
-        r.entity_id: r
-        for r in registry
-        if r.entity_id.startswith("sensor.")
-        and (r.platform == "template")
-        and tag in r.labels
-    }
+    registry_map = {r.entity_id: r for r in registry if is_group_helper(r, tag)}
     state_map = {s.entity_id: s for s in states if isinstance(s.entity_id, str)}
 
     if not registry_map:
         _LOG.warning("No tagged template sensor helpers found for tag '%s'.", tag)
 
-    groups: list[ControlGroupOptions] = []
-    for eid, reg in registry_map.items():
-        group = _to_group(state_map[eid])
-        if not group:
-            _LOG.warning("Skipping helper with invalid entity id: %s", eid)
-            continue
-        _LOG.warning("Getting template for config entry %s", reg.config_entry_id)
-        group.template = await api.rest.get_config_entry_template(reg.config_entry_id)
-        _LOG.info(group.template)
-
-        if not group.entities:
-            _LOG.warning(
-                "Helper '%s' has no target entities (expected attribute like entities/control_group_entities).",
-                reg.entity_id,
-            )
-        groups.append(group)
+    for eid in registry_map.keys() - state_map.keys():
+        _LOG.warning("Skipping helper %s, it has no state.", eid)
+    # template fetches run concurrently, bounded by api.rest.max_parallel
+    loaded = await asyncio.gather(
+        *(
+            load_group(api, reg, state)
+            for eid, reg in registry_map.items()
+            if (state := state_map.get(eid))
+        )
+    )
+    groups = [g for g in loaded if g]
+    timing["templates"] = time.perf_counter() - start - sum(timing.values())
 
     _LOG.info(
-        "Loaded %d control groups from HA template helpers tagged '%s'.",
+        "Loaded %d control groups from HA template helpers tagged '%s' in %s",
         len(groups),
         tag,
+        ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in timing.items()),
     )
     return groups
 
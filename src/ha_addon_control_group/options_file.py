@@ -3,14 +3,18 @@
 Persistent UUID etc.
 """
 
+import asyncio
 import json
 import logging
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 from uuid import uuid4
 
 from cattrs.preconf.json import make_converter
 
+from ha_addon.helpers import write_atomic
+
 CONVERTER = make_converter()
 _LOG = logging.getLogger(__name__)
 
@@ -29,13 +33,50 @@ class FileOptions:
     uuid: str = ""
     groups: dict[str, FileGroupOption] = field(default_factory=dict)
 
+    # init=False fields are not stored
+    path: Path = field(default=Path("/config/state.json"), init=False, repr=False)
+    """The file to save to. Migrate to /data later."""
+    delay: float = field(default=1, init=False, repr=False)
+    """Seconds to collect changes before saving."""
+    writes: int = field(default=0, init=False, repr=False)
+    """Number of files written."""
+    _dirty: bool = field(default=False, init=False, repr=False)
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
     def save_file(self) -> None:
-        """Save options."""
-        data = CONVERTER.unstructure(self)
-        opt = Path("/config/state.json")  # migrate to /data later
-        opt.parent.mkdir(exist_ok=True, parents=True)
-        with opt.open("w") as f:
-            json.dump(data, f, indent=2)
+        """Save options, after `delay` seconds. Saves directly without event loop."""
+        self._dirty = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._snapshot())
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        """Save after the delay."""
+        await asyncio.sleep(self.delay)
+        self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Save pending changes now. Call on shutdown."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._dirty:
+            await asyncio.to_thread(self._write, self._snapshot())
+
+    def _snapshot(self) -> dict[str, Any]:
+        """Unstructure the options, changes after this are saved next time."""
+        self._dirty = False
+        self.writes += 1
+        return CONVERTER.unstructure(self)
+
+    def _write(self, data: dict[str, Any]) -> None:
+        """Write atomically, indented for humans."""
+        write_atomic(self.path, json.dumps(data, indent=2).encode())
 
     def load_file(self) -> None:
         """Load options from the configuration files."""
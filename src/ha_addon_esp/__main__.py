@@ -8,7 +8,9 @@ from dataclasses import dataclass, field
 from mqtt_entity import MQTTClient
 from mqtt_entity.options import MQTTOptions
 
-from .esp import ESP, search_area
+from ha_addon.ha_api import SESSIONS
+
+from .esp import ESP, SensorOptions, refresh_areas, search_area
 
 _LOG = logging.getLogger(__name__)
 
@@ -17,7 +19,14 @@ async def main_loop() -> int:
     """Entry point."""
     opt = Options()
     await opt.init_addon()
+    try:
+        return await run(opt)
+    finally:
+        await SESSIONS.close()
+
 
+async def run(opt: "Options") -> int:
+    """Publish the areas, refresh them until cancelled."""
     if opt.search_area:
         await search_area(opt.search_area, opt.areas[0].api_key)
 
@@ -39,8 +48,11 @@ async def main_loop() -> int:
                 area_id=area.area_id,
                 ha_prefix=area.ha_prefix,
                 client=client,
+                extra_sensors=opt.sensors,
             )
         )
+    for dev in devs:
+        await dev.load()
     client.devs.extend([d.mqtt_dev for d in devs])
 
     await client.connect(opt)
@@ -50,22 +62,21 @@ async def main_loop() -> int:
     # wait a bit for discovery
     await asyncio.sleep(10)
 
-    for dev in devs:
-        await dev.init()
+    await refresh_areas(devs, init=True)
 
-    wait = 60 * 5  # Initially wait 5 min for an update
+    wait = 60 * 5.0  # Initially wait 5 min for an update
 
     while True:
         try:
             await asyncio.sleep(wait)
-            for dev in devs:
-                await dev.callback(client)
+            wait = await refresh_areas(devs)
+            _LOG.info("Next update in %.0f minutes", wait / 60)
         except asyncio.CancelledError:
             _LOG.info("Shutting down ESP sensors")
             break
         except Exception as ex:
             _LOG.exception("Error in main loop: %s", ex)
-        wait = 60 * 60  # Update every hour
+            wait = 60 * 60
     return 0
 
 
@@ -83,6 +94,7 @@ class Options(MQTTOptions):
     """HASS Addon Options."""
 
     areas: list[AreaOptions] = field(default_factory=list)
+    sensors: list[SensorOptions] = field(default_factory=list)
     search_area: str = ""
     debug: int = 0
 
@@ -2,25 +2,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import traceback
 from dataclasses import dataclass, field
-from pathlib import Path
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import aiohttp
-from jmespath import search
+import jmespath
+from jmespath.exceptions import JMESPathError
 from mqtt_entity import MQTTClient, MQTTDevice, MQTTSensorEntity
 from mqtt_entity.helpers import hass_share_path
 from mqtt_entity.utils import slug
 
+from ha_addon.ha_api import SESSIONS
+from ha_addon.helpers import JsonStore
+
 _LOG = logging.getLogger(__name__)
 
 URI = "https://developer.sepush.co.za/business/2.0"
 API_STATE = f"{URI}/area"
 API_ALLOWANCE = f"{URI}/api_allowance"
 ADDON_SLUG = "hass-addon-esp"
+SAST = timezone(timedelta(hours=2))
+MIN_WAIT = 30 * 60
+"""Minimum seconds between refreshes."""
 
 
 @dataclass
@@ -43,40 +51,58 @@ class ESP:
 
     state: dict[str, Any] = field(default_factory=dict)
     """State of the area."""
-    statefile: Path = field(init=False)
+    allowance: dict[str, Any] = field(default_factory=dict)
+    """API allowance of the api_key, set by refresh_areas."""
+    store: JsonStore = field(init=False)
     """Persistent storage for the area's state."""
+    name_sensor: JMESSensor = field(init=False)
     sensors: list[ESPSensor] = field(default_factory=list)
+    extra_sensors: list[SensorOptions] = field(default_factory=list)
+    """User-defined JMESPath sensors."""
 
     def __post_init__(self) -> None:
         """Init."""
-        self.statefile = (
+        self.store = JsonStore(
             hass_share_path(ADDON_SLUG, True) / f"esp_{slug(self.area_id)}.json"
         )
-        if self.statefile.exists():
-            _LOG.debug("Loading state from %s", self.statefile)
-            with self.statefile.open(encoding="utf-8") as jsf:
-                self.state = json.load(jsf)
-
-        name_sensor = JMESSensor(
+        self.name_sensor = JMESSensor(
             name="Area",
             state_expr="info.name",
             attr_expr="{region: info.region, events: events, schedule: schedule}",
         )
         self.sensors = [
-            name_sensor,
+            self.name_sensor,
             JMESSensor(
                 name="Next", state_expr="events[0].start", attr_expr="events[0]"
             ),
             AllowanceSensor(name="Allowance"),
         ]
+        for sop in self.extra_sensors:
+            try:
+                self.sensors.append(
+                    JMESSensor(
+                        name=sop.name,
+                        state_expr=sop.state_expr,
+                        attr_expr=sop.attr_expr,
+                    )
+                )
+            except JMESPathError as err:
+                _LOG.error("Invalid expression for sensor '%s': %s", sop.name, err)
 
         # Set up the MQTT device
         self.mqtt_dev.identifiers[0] = self.id()
-        self.area = search(name_sensor.state_expr, self.state) or self.area_id
+        self.area = self.area_id
         self.mqtt_dev.name = f"ESP area {self.area}"
         for sen in self.sensors:
             sen.init_entity(self.mqtt_dev, self.ha_prefix)
 
+    async def load(self) -> None:
+        """Load the stored state, name the device after the area."""
+        _LOG.debug("Loading state from %s", self.store.path)
+        self.state = await self.store.load() or {}
+        self.area = self.name_sensor.value(self.state) or self.area_id
+        self.mqtt_dev.name = f"ESP area {self.area}"
+
     def id(self) -> str:
         """Return the identifiers for the ESP."""
         return f"eskomsp_{slug(self.area_id)}"
@@ -85,9 +111,8 @@ class ESP:
         """Query the API."""
         try:
             headers = {"token": self.api_key}
-            async with aiohttp.ClientSession() as session:
-                async with session.get(uri, headers=headers, params=params) as resp:
-                    return await resp.json()
+            async with SESSIONS.get().get(uri, headers=headers, params=params) as resp:
+                return await resp.json()
         except aiohttp.ClientError as err:
             _LOG.error("Read Error: %s: %s", type(err), err)
             return {}
@@ -98,9 +123,8 @@ class ESP:
         if not val:
             return
         self.state = val
-        _LOG.debug("Saving state to %s", self.statefile)
-        with self.statefile.open("w", encoding="utf-8") as jsf:
-            json.dump(val, jsf, indent=2)
+        if await self.store.save(val):
+            _LOG.debug("Saved state to %s", self.store.path)
 
     async def callback(self, client: MQTTClient) -> None:
         """ESP callback - run every hour."""
@@ -153,23 +177,51 @@ class ESPSensor:
         raise NotImplementedError
 
 
+@dataclass
+class SensorOptions:
+    """Options for a user-defined JMESPath sensor."""
+
+    name: str = ""
+    state_expr: str = ""
+    attr_expr: str = ""
+
+
 @dataclass(slots=True)
 class JMESSensor(ESPSensor):
     """JMES Sensor."""
 
     state_expr: str = field()
-    attr_expr: str = field()
+    attr_expr: str = ""
+    _state_jp: jmespath.parser.ParsedResult = field(init=False, repr=False)
+    _attr_jp: jmespath.parser.ParsedResult | None = field(init=False, repr=False)
+    _last: str = field(default="", init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compile the expressions."""
+        self._state_jp = jmespath.compile(self.state_expr)
+        self._attr_jp = jmespath.compile(self.attr_expr) if self.attr_expr else None
+
+    def value(self, state: dict[str, Any]) -> Any:
+        """Evaluate the state expression."""
+        return self._state_jp.search(state)
 
     async def get_state(self, esp: ESP) -> Any:
-        """Get state from ESP state."""
-        val = search(self.state_expr, esp.state)
-        await self.entity.send_state(esp.client, val, retain=True)
-        atr = search(self.attr_expr, esp.state)
-        if not isinstance(atr, dict):
+        """Get state from ESP state. Publish only if changed."""
+        val = self.value(esp.state)
+        atr = self._attr_jp.search(esp.state) if self._attr_jp else None
+        if atr is not None and not isinstance(atr, dict):
             atr = {"value": atr}
-        _LOG.debug("Attributes %s = %s", self.name, json.dumps(atr))
-        try:
-            await self.entity.send_json_attributes(esp.client, atr)
+        last = json.dumps([val, atr])  # a snapshot, the state can be changed in place
+        if last == self._last:
+            _LOG.debug("%s unchanged", self.name)
+            return val
+        self._last = last
+        await self.entity.send_state(esp.client, val, retain=True)
+        if atr is None:
+            return val
+        _LOG.debug("Attributes %s = %s", self.name, atr)
+        try:  # retained, the next publish can be hours away
+            await self.entity.send_json_attributes(esp.client, atr, retain=True)
         except TypeError as err:
             _LOG.error("%s", err)
         return val
@@ -180,9 +232,8 @@ class AllowanceSensor(ESPSensor):
     """Allowance Sensor."""
 
     async def get_state(self, esp: ESP) -> Any:
-        """Read the sensor value from the API."""
-        api = await esp.query(API_ALLOWANCE, {})
-        api = api.get("allowance", {})
+        """Publish the allowance fetched by refresh_areas."""
+        api = esp.allowance
         v_count = api.get("count", -1)
         v_limit = api.get("limit", 50)
         if api:
@@ -193,30 +244,72 @@ class AllowanceSensor(ESPSensor):
                 _LOG.error("%s", err)
 
 
+async def refresh_areas(devs: list[ESP], *, init: bool = False) -> float:
+    """Refresh all areas concurrently, with one allowance fetch per API key.
+
+    Returns the seconds until the next refresh, see next_wait.
+    """
+    by_key = dict[str, list[ESP]]()
+    for dev in devs:
+        by_key.setdefault(dev.api_key, []).append(dev)
+    # api_allowance calls do not count against the quota
+    allowances = await asyncio.gather(
+        *(kdevs[0].query(API_ALLOWANCE, {}) for kdevs in by_key.values())
+    )
+    for kdevs, alw in zip(by_key.values(), allowances, strict=True):
+        allowance = alw.get("allowance", {})
+        if "count" in allowance:  # count the area queries this refresh makes
+            allowance["count"] += sum(not init or not dev.state for dev in kdevs)
+        for dev in kdevs:
+            dev.allowance = allowance
+
+    res = await asyncio.gather(
+        *(dev.init() if init else dev.callback(dev.client) for dev in devs),
+        return_exceptions=True,
+    )
+    for dev, err in zip(devs, res, strict=True):
+        if err:
+            _LOG.error("Refreshing area %s failed: %s", dev.area, err)
+    return max(next_wait(kdevs[0].allowance, len(kdevs)) for kdevs in by_key.values())
+
+
+def next_wait(
+    allowance: dict[str, Any], calls: int, now: datetime | None = None
+) -> float:
+    """Spread the remaining quota over the rest of the day.
+
+    Each refresh uses `calls` of the quota.
+    """
+    if "limit" not in allowance:
+        return 60 * 60  # unknown, hourly
+    # ponytail: assumes the quota resets at midnight SAST
+    now = now or datetime.now(SAST)
+    reset = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    left = (reset - now).total_seconds()
+    refreshes = (allowance["limit"] - allowance.get("count", 0)) // calls
+    if refreshes < 1:
+        return left + 60  # after the reset
+    return max(MIN_WAIT, left / refreshes)
+
+
 AST = "areas_search"
 
 
 async def search_area(name: str, api_key: str) -> None:
     """Search for an area."""
-    res = {}
-    sfile = hass_share_path(ADDON_SLUG, True) / "esp_search.json"
-    if sfile.exists():
-        with sfile.open("r", encoding="utf8") as fjson:
-            res = json.load(fjson)
-        cname = res.get(AST)
-        if cname == name:
-            res["cached"] = True
-        else:
-            res = {}
+    store = JsonStore(hass_share_path(ADDON_SLUG, True) / "esp_search.json")
+    res: dict[str, Any] = await store.load() or {}
+    if res.get(AST) == name:
+        res["cached"] = True
+    else:
+        res = {}
 
     if not res:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{URI}/{AST}", headers={"token": api_key}, params={"text": name}
-            ) as resp:
-                res = await resp.json()
-                res[AST] = name
-                with sfile.open("w", encoding="utf8") as fjson:
-                    json.dump(res, fjson)
+        async with SESSIONS.get().get(
+            f"{URI}/{AST}", headers={"token": api_key}, params={"text": name}
+        ) as resp:
+            res = await resp.json()
+            res[AST] = name
+            await store.save(res)
 
     _LOG.info("Search result:\n%s", json.dumps(res, indent=2))
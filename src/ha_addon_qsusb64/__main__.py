@@ -1,14 +1,29 @@
 """Main."""
 
 import asyncio
+import logging
 import sys
 
-from colorama import Fore
-
 from .addon.bridge import HassBridge
 from .addon.options import OPT
-from .qsusb import QsUsb
-from .qwikswitch import qs_decode
+from .qsusb import QsUsb, QsWriter
+from .qwikswitch import QsFrame, QsMsg
+
+_LOG = logging.getLogger(__name__)
+
+
+async def process_frame(hass: HassBridge, writer: QsWriter, data: QsMsg) -> None:
+    """Decode a frame and pass it to the bridges."""
+    qsf = QsFrame.decode(data)
+    _LOG.debug("RX %s", qsf)  # formatted only if enabled
+    qid = qsf.id
+    if qsf.cmd == "STATUS.ACK":
+        writer.ack(qid)
+    try:
+        for _, br in hass.find_ids(qid):
+            await br.process_msg(qsf, hass.client)
+    except ValueError as e:
+        _LOG.error("Error processing message: %s", e)
 
 
 async def main_loop() -> int:
@@ -17,28 +32,28 @@ async def main_loop() -> int:
     OPT.check_allok()
 
     try:
-        qsusb = QsUsb()
+        qsusb = QsUsb(record=OPT.record)
     except ConnectionError:
         return 2
 
-    hass = HassBridge(qs_write=qsusb.write)
+    writer = QsWriter(usb=qsusb)
+    hass = HassBridge(qs_write=writer.write)
     await hass.mqtt_connect()
 
+    qsusb.start_reader()
+    write_task = asyncio.create_task(writer.run())
     try:
         while True:
-            data: list[int] = qsusb.read()
-            if data:
-                qsd = qs_decode(data)
-                print(f"RX {Fore.YELLOW}{qsd}")
-                if qid := qsd.get("id"):
-                    try:
-                        for _, br in hass.find_ids(qid):
-                            await br.process_msg(qsd, hass.client)
-                    except ValueError as e:
-                        print(f"{Fore.RED}Error processing message: {e}")
-
-            await asyncio.sleep(0.1)
+            # process bursts in order, without waiting between frames
+            for data in await qsusb.read_all():
+                await process_frame(hass, writer, data)
+    except ConnectionError:
+        return 1
     except KeyboardInterrupt:
+        pass
+    finally:
+        write_task.cancel()
+        _LOG.info("Writes: %s", writer)
         qsusb.close()
     return 0
 
@@ -4,9 +4,7 @@ from __future__ import annotations
 
 import logging
 import time
-from collections.abc import Generator
 from dataclasses import dataclass, field
-from typing import Any
 
 from mqtt_entity.client import MQTTClient
 from mqtt_entity.device import MQTTDevice
@@ -16,6 +14,7 @@ from mqtt_entity.entities import (
 )
 
 from ..qsusb import QsWrite
+from ..qwikswitch import QsFrame
 from .entity_bridge import (
     BinarySensorBridge,
     Bridge,
@@ -38,6 +37,9 @@ class HassBridge:
     devs: list[MQTTDevice] = field(default_factory=list)
     bridges: list[Bridge] = field(default_factory=list)
     client: MQTTClient = field(init=False, repr=False)
+    routes: dict[str, list[tuple[MQTTBaseEntity, Bridge]]] = field(init=False)
+    """The entities & bridges per QS ID."""
+    ignore: set[str] = field(init=False)
 
     async def mqtt_connect(self) -> None:
         """Connect to the MQTT broker and publish discovery info."""
@@ -50,18 +52,15 @@ class HassBridge:
         await self.client.connect(OPT)
         self.client.monitor_homeassistant_status()
 
-    def find_ids(self, qid: str) -> Generator[tuple[MQTTBaseEntity, Bridge]]:
-        """Find the entity by ID."""
-        cnt = 0
-        for ent in self.bridges:
-            if base := ent.find_entity(qid):
-                yield base, ent
-                cnt += 1
-        if cnt == 0:
-            if qid not in [i.id for i in OPT.ignore]:
-                _LOG.warning("ID not found %s", qid)
-            else:
-                _LOG.debug("ID %s is in the ignore list.", qid)
+    def find_ids(self, qid: str) -> list[tuple[MQTTBaseEntity, Bridge]]:
+        """Find the entities & bridges for a QS ID."""
+        if found := self.routes.get(qid):
+            return found
+        if qid in self.ignore:
+            _LOG.debug("ID %s is in the ignore list.", qid)
+        else:
+            _LOG.warning("ID not found %s", qid)
+        return []
 
     def __post_init__(self) -> None:
         """Create entities for the devices."""
@@ -99,6 +98,7 @@ class HassBridge:
         for b in (b for b in self.bridges if isinstance(b, ButtonDevBridge)):
             all_ids.extend(b.hassbtn.keys())
         all_ids.extend(qsslug(i.id, parse=True) for i in OPT.ignore)
+        self.index()
 
         _LOG.debug("All QS IDs: %s", all_ids)
 
@@ -114,6 +114,18 @@ class HassBridge:
                 if uid not in dev.components:
                     dev.remove_components[uid] = br.platform
 
+    def index(self) -> None:
+        """Index the bridges by QS ID, after the entities are created."""
+        qids = [b.opt.id for b in self.bridges if isinstance(b, Bridge1)]
+        for b in (b for b in self.bridges if isinstance(b, ButtonDevBridge)):
+            qids.extend(b.opt.btn_map)
+        self.routes = {}
+        for qid in qids:
+            self.routes[qid] = [
+                (base, br) for br in self.bridges if (base := br.find_entity(qid))
+            ]
+        self.ignore = {i.id for i in OPT.ignore}
+
 
 @dataclass
 class ButtonDevBridge(Bridge):
@@ -157,12 +169,9 @@ class ButtonDevBridge(Bridge):
         self.dev.components.update(self.hassbtn)
         return dict(self.hassbtn)
 
-    async def process_msg(self, msg: dict[str, Any], client: MQTTClient) -> bool:
+    async def process_msg(self, msg: QsFrame, client: MQTTClient) -> bool:
         """Process a button message."""
-        qid = msg.get("id")
-        if not qid:
-            return False
-
+        qid = msg.id
         # debounce 200ms
         if time.time() < self.press_time:
             return False
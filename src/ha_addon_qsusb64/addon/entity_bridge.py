@@ -18,7 +18,7 @@ from mqtt_entity.entities import (
 from mqtt_entity.utils import tostr
 
 from ..qsusb import QsWrite
-from ..qwikswitch import qs_encode, qsslug
+from ..qwikswitch import QsFrame, qs_encode, qsslug
 from .options import OPT, DeviceOpt
 
 _LOG = logging.getLogger(__name__)
@@ -34,7 +34,7 @@ class Bridge:
         """Return a generator of Home Assistant entities."""
         raise NotImplementedError()
 
-    async def process_msg(self, msg: dict[str, Any], client: MQTTClient) -> bool:
+    async def process_msg(self, msg: QsFrame, client: MQTTClient) -> bool:
         """Process a message from the QS device."""
         raise NotImplementedError()
 
@@ -116,24 +116,24 @@ class LightBridge(Bridge1):
             )
         return {slug_id: self.hassdev}
 
-    async def process_msg(self, msg: dict[str, Any], client: MQTTClient) -> bool:
+    async def process_msg(self, msg: QsFrame, client: MQTTClient) -> bool:
         """Process a switch message."""
-        qid = msg.get("id")
+        qid = msg.id
         if not qid or qid != self.opt.id:
             return False
 
         if self.opt.kind == "rel" or isinstance(self.hassdev, MQTTSwitchEntity):
-            await self.hassdev.send_state(client, payload=str(msg.get("val")))
+            await self.hassdev.send_state(client, payload=str(msg.val))
             return True
 
         if self.opt.kind == "dim":
-            value = bright2val(msg.get("val"))
+            value = bright2val(msg.val)
             await self.hassdev.send_brightness(client, brightness=value)
             await self.hassdev.send_state(client, payload=bool(value))
             return True
 
         if self.opt.kind == "imod":
-            value = bright2val(msg.get("val"))
+            value = bright2val(msg.val)
             await self.hassdev.send_state(client, payload=bool(value))
             return True
 
@@ -188,13 +188,13 @@ class BinarySensorBridge(Bridge1):
         )
         return {slug_id: self.hassdev}
 
-    async def process_msg(self, msg: dict[str, Any], client: MQTTClient) -> bool:
+    async def process_msg(self, msg: QsFrame, client: MQTTClient) -> bool:
         """Process a switch message."""
-        m_id = msg.get("id")
+        m_id = msg.id
         if not m_id or m_id != self.opt.id:
             return False
 
-        m_val = msg.get("val")
+        m_val = msg.val
         if m_val is None:
             m_val = self.toggle = not self.toggle
 
@@ -221,9 +221,9 @@ class SensorBridge(Bridge1):
         )
         return {self.uid: self.hassdev}
 
-    async def process_msg(self, msg: dict[str, Any], client: MQTTClient) -> bool:
+    async def process_msg(self, msg: QsFrame, client: MQTTClient) -> bool:
         """Process a switch message."""
-        m_id = msg.get("id")
+        m_id = msg.id
         if not m_id or m_id != self.opt.id:
             return False
         self.count += 1
@@ -80,6 +80,8 @@ class Options(MQTTOptions):
 
     debug: int = 0
     prefix: str = "qsusb64"
+    record: str = ""
+    """Append the received frames to this file, to replay them later."""
 
     def check_allok(self) -> None:
         """Remove entities with empty IDs."""
@@ -0,0 +1,138 @@
+"""Benchmark the add-on by replaying a capture, without the USB modem.
+
+uv run python -m ha_addon_qsusb64.bench [capture] [speed]
+
+Without a capture, a synthetic 64 device, 200 button install is replayed. With a
+capture (see the RECORD option), the devices are loaded from the add-on options.
+A speed of 0 (the default) replays as fast as possible.
+"""
+
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, cast
+
+from mqtt_entity.utils import logging_color
+
+from .__main__ import process_frame
+from .addon.bridge import HassBridge
+from .addon.options import OPT, ButtonOpt, DeviceOpt
+from .qsusb import QsUsb, QsWriter
+from .qwikswitch import l2s
+from .transport import Player
+
+_LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class MqttStandIn:
+    """Collect the MQTT publishes in memory, instead of sending to a broker."""
+
+    published: list[tuple[float, str, str | None]] = field(default_factory=list)
+
+    async def publish(
+        self,
+        topic: str,
+        payload: str | None = None,
+        qos: int = 0,
+        retain: bool = False,
+    ) -> None:
+        """Publish a MQTT message."""
+        self.published.append((time.perf_counter(), topic, payload))
+
+
+def synthetic(path: Path, count: int = 10_000) -> None:
+    """Configure 64 devices & 200 buttons. Write a capture with status & presses."""
+    ids = [(0x10, 0, idx) for idx in range(64)]
+    btns = [(0x20, idx >> 8, idx & 0xFF) for idx in range(200)]
+    OPT.lights = [
+        DeviceOpt(id="@" + l2s(qid, ""), kind=("dim", "rel")[i % 2], name=f"L{i}")
+        for i, qid in enumerate(ids)
+    ]
+    OPT.buttons = [
+        ButtonOpt(name=f"B{i}", buttons=["@" + l2s(b, "") for b in btns[i::50]])
+        for i in range(50)
+    ]
+    OPT.check_allok()
+
+    rnd = random.Random(1)
+    ts = time.time()
+    with path.open("w", encoding="utf-8") as fptr:
+        for _ in range(count):
+            ts += 0.005
+            if rnd.random() < 0.3:
+                frame = [1, 8, *rnd.choice(btns), 0, 1, 5, 80, 0, 0, 0]
+            else:
+                idx = rnd.randrange(64)
+                kind, val = (
+                    (0x81, rnd.randrange(0x7E)) if idx % 2 == 0 else (0x91, 0x80)
+                )
+                frame = [1, 11, *ids[idx], 0, 80, 0, kind, 3, val, 0]
+            fptr.write(f"{ts:.6f} {l2s(frame)}\n")
+
+
+async def bench(capture: Path, speed: float = 0) -> dict[str, float]:
+    """Replay the capture. Return frames/s and the frame to publish latency."""
+    player = Player(capture, speed)
+    qsusb = QsUsb(dev=player, read_timeout=50)
+    writer = QsWriter(usb=qsusb)
+    hass = HassBridge(qs_write=writer.write)
+    mqtt = MqttStandIn()
+    hass.client = cast(Any, mqtt)
+
+    latency = list[float]()
+    count = 0
+    qsusb.start_reader()
+    start = time.perf_counter()
+    try:
+        while True:
+            for data in await qsusb.read_all():
+                before = len(mqtt.published)
+                await process_frame(hass, writer, data)
+                if len(mqtt.published) > before:
+                    latency.append(mqtt.published[before][0] - player.emitted[count])
+                count += 1
+    except ConnectionError:  # end of capture
+        pass
+    finally:
+        qsusb.close()
+    elapsed = time.perf_counter() - start
+
+    res = {
+        "frames": count,
+        "frames/s": count / elapsed,
+        "publishes": len(mqtt.published),
+        "p50 ms": statistics.median(latency) * 1e3 if latency else 0,
+        "p99 ms": statistics.quantiles(latency, n=100)[98] * 1e3
+        if len(latency) > 1
+        else 0,
+    }
+    _LOG.info("%s", " ".join(f"{k}={v:.2f}" for k, v in res.items()))
+    return res
+
+
+async def main_loop() -> int:
+    """Entry point."""
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    if len(sys.argv) > 1:
+        await OPT.init_addon()
+        OPT.check_allok()
+        await bench(Path(sys.argv[1]), speed)
+        return 0
+
+    logging_color()
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = Path(tmp) / "capture.log"
+        synthetic(capture)
+        await bench(capture, speed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main_loop()))
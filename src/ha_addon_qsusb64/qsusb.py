@@ -1,14 +1,19 @@
 """QsUsb HID interface."""
 
+import asyncio
 import logging
+import threading
+import time
 from collections.abc import Callable
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
 import hid  # type: ignore[import-not-found]
 from colorama import Fore
 
-from .qwikswitch import QsMsg, l2s
+from .qwikswitch import QsMsg, l2s, string_id
+from .transport import Recorder
 
 type QsWrite = Callable[[QsMsg], None]
 
@@ -19,11 +24,26 @@ _LOG = logging.getLogger(__name__)
 class QsUsb:
     """Connect to the QsUsb device."""
 
-    dev: Any = field(init=False, repr=False)
+    dev: Any = field(default=None, repr=False)
+    """The HID device or a transport. Opened from vid_pid if None."""
     vid_pid: tuple[int, int] = (0x04D8, 0x2005)
+    record: str = ""
+    """Append the frames read to this capture file."""
+    read_timeout: int = 500
+    """Milliseconds the reader thread blocks per read, bounds the time to stop."""
+    _rx: asyncio.Queue[QsMsg] | None = field(default=None, init=False, repr=False)
+    _thread: threading.Thread | None = field(default=None, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False)
 
     def __post_init__(self) -> None:
         """Connect."""
+        if self.dev is None:
+            self._open()
+        if self.record:
+            self.dev = Recorder(self.dev, Path(self.record))
+
+    def _open(self) -> None:
+        """Open the HID device."""
         self.dev = hid.device()
         try:
             self.dev.open(*self.vid_pid)
@@ -51,6 +71,144 @@ class QsUsb:
             return []
         return data[:size]
 
+    def start_reader(self) -> None:
+        """Read in a background thread, use read_all() to receive the frames."""
+        loop = asyncio.get_running_loop()
+        self._rx = asyncio.Queue()
+        self._stop.clear()
+        self.dev.set_nonblocking(0)
+        self._thread = threading.Thread(
+            target=self._read_thread, args=(loop, self._rx), name="qsusb", daemon=True
+        )
+        self._thread.start()
+
+    def _read_thread(
+        self, loop: asyncio.AbstractEventLoop, rx: asyncio.Queue[QsMsg]
+    ) -> None:
+        """Block on the device and hand every frame to the event loop."""
+        try:
+            while not self._stop.is_set():
+                if data := self.dev.read(64, self.read_timeout):
+                    loop.call_soon_threadsafe(rx.put_nowait, data[:12])
+        except EOFError as err:  # a replay ended
+            _LOG.info("QSUSB reader stopped: %s", err)
+        except (OSError, ValueError) as err:
+            _LOG.error("QSUSB read failed: %s", err)
+        finally:
+            try:
+                loop.call_soon_threadsafe(rx.put_nowait, [])  # reader stopped
+            except RuntimeError:
+                pass  # the loop is closed
+
+    async def read_all(self) -> list[QsMsg]:
+        """Wait for a frame, return it with all other buffered frames."""
+        if self._rx is None:
+            raise RuntimeError("Call start_reader() first")
+        frames = [await self._rx.get()]
+        while not self._rx.empty():
+            frames.append(self._rx.get_nowait())
+        if frames[-1]:
+            return frames
+        frames.pop()
+        self._rx.put_nowait([])  # keep the stop marker for the next call
+        if frames:
+            return frames
+        raise ConnectionError("QSUSB reader stopped")
+
     def close(self) -> None:
         """Close the HID device."""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
         self.dev.close()
+
+
+@dataclass
+class QsWriter:
+    """Send writes to the QS modem one at a time, paced and acknowledged.
+
+    write() only queues, so it is safe to call from MQTT callbacks. A queued SET
+    for the same device is replaced by the latest value (a slider move).
+    """
+
+    usb: QsUsb
+    interval: float = 0.1
+    """Minimum seconds between writes."""
+    ack_timeout: float = 0.5
+    """Seconds to wait for the STATUS.ACK of a SET."""
+    retries: int = 2
+    """Resend a SET this many times if it is not acknowledged."""
+    queued: int = field(default=0, init=False)
+    merged: int = field(default=0, init=False)
+    """Queued SETs replaced by a newer value before they were sent."""
+    sent: int = field(default=0, init=False)
+    retried: int = field(default=0, init=False)
+    dropped: int = field(default=0, init=False)
+    """Messages given up on after all retries or a write error."""
+    max_depth: int = field(default=0, init=False)
+    _pending: dict[object, QsMsg] = field(default_factory=dict, init=False)
+    _acks: dict[str, asyncio.Future[None]] = field(default_factory=dict, init=False)
+    _wake: asyncio.Event = field(default_factory=asyncio.Event, init=False)
+    _last: float = field(default=0.0, init=False)
+
+    def write(self, data: QsMsg) -> None:
+        """Queue a message for the modem."""
+        # only SET (9) is idempotent, toggles all have to be sent
+        key: object = ("SET", *data[2:5]) if data[1] == 9 else object()
+        if key in self._pending:
+            self.merged += 1
+        self._pending[key] = data
+        self.queued += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._wake.set()
+
+    def __str__(self) -> str:
+        """Summarize the statistics."""
+        return (
+            f"queued={self.queued} merged={self.merged} sent={self.sent} "
+            f"retried={self.retried} dropped={self.dropped} "
+            f"depth={len(self._pending)}/{self.max_depth}"
+        )
+
+    def ack(self, qid: str) -> None:
+        """Acknowledge a SET, call on every STATUS.ACK received."""
+        if (fut := self._acks.get(qid)) and not fut.done():
+            fut.set_result(None)
+
+    async def run(self) -> None:
+        """Send the queued messages, forever."""
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._pending:
+                key = next(iter(self._pending))
+                await self._send(key, self._pending.pop(key))
+
+    async def _send(self, key: object, data: QsMsg) -> None:
+        """Send a message, retry a SET until acknowledged."""
+        qid = string_id(data[2:5])
+        for attempt in range(self.retries + 1):
+            if attempt:
+                if key in self._pending:  # superseded by a newer value
+                    return
+                self.retried += 1
+            await asyncio.sleep(self._last + self.interval - time.monotonic())
+            fut = self._acks[qid] = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.to_thread(self.usb.write, data)
+                self._last = time.monotonic()
+                self.sent += 1
+                if data[1] != 9:
+                    return
+                await asyncio.wait_for(fut, self.ack_timeout)
+                return
+            except TimeoutError:
+                pass
+            except (OSError, ValueError) as err:
+                _LOG.error("QSUSB write failed: %s", err)
+                break
+            finally:
+                self._acks.pop(qid, None)
+        self.dropped += 1
+        _LOG.warning("No ACK from %s, dropped %s", qid, l2s(data))
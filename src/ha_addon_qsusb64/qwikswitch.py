@@ -1,11 +1,16 @@
 """QwikSwitch USB HID protocol."""
 
+from __future__ import annotations
+
+import logging
 from collections import defaultdict
-from typing import Any
+from dataclasses import dataclass
 
 type QsId = tuple[int, int, int]
 type QsMsg = list[int]
 
+_LOG = logging.getLogger(__name__)
+
 
 def l2s(data: QsMsg | QsId, sep: str = " ") -> str:
     """Return a string representation of the current state."""
@@ -72,68 +77,98 @@ def qs_encode(cmd: str, qid: str, val: int) -> QsMsg:
     return data
 
 
-def qs_decode(data: QsMsg) -> dict[str, Any]:  # noqa: PLR0912
-    """Decode a QwikSwitch USB hub message."""
-    if data[0] != 0x01 or data[5] != 0x00:
-        print("Error: ", l2s(data))
-    res = {
-        "id": string_id(data[2:5]),
-        "cmd": data[1],
-    }
-    match res["cmd"]:
-        case 8:
-            res["cmd"] = "TOGGLE"
-            res["cnt"] = data[6]
-            if data[7] == 0x2:
-                res["cmd"] = "TOGGLE.PING"
-            elif data[7] != 5:
-                res["cmd"] = f"TOGGLE.{data[7]}"
-            res["rssi"] = f"{data[8]}%"
-            data = data[:10]  # ignore last 2
-        case 9:
-            res["cmd"] = "SET"
-            res["cnt"] = data[6]
-            res["val"] = data[8]
-        case 10:  # update settings
-            res["cmd"] = "SETTINGS"
-            res["report"] = f"/{data[9]}min"
-
-        case 11:
-            res["cmd"] = "STATUS.ACK"
-            type_map = {0x81: "RX1DIM", 0x91: "RX1REL"}
-            typ = type_map.get(data[8], f"UNKNOWN({data[8]:02X})")
-            ver = f"v{data[9]}"
-
-            match typ:
-                case "RX1REL":
-                    # bit 10=0x80 on, 0x00 off
-                    res["val"] = (
-                        "ON"
-                        if data[10] == 0x80
-                        else "OFF"
-                        if data[10] == 0x00
-                        else f"?{data[10]:02X}"
-                    )
-                case "RX1DIM":
-                    # bit 10=0x80 on, 0x00 off
-                    vvv = data[10]
-                    if vvv == 0x7D:
-                        res["val"] = "OFF"
-                    elif vvv in (0x5A, 0x00):
-                        res["val"] = "ON"
-                    elif vvv > 0 and vvv < 0x7D:
-                        # 0 is 100% and 0x7d is 0%
-                        vvv = 100 - (vvv * 100 // 0x7D)
-                        res["val"] = f"{vvv}%"
-                    else:
-                        res["val"] = f"?{data[10]:02X}"
-
-            res["type"] = f"{typ}{ver}"
-            res["rssi"] = f"{data[6]}%"
-
-        case _:
-            pass
-    data = data[6:]
-
-    res["x"] = ".".join([f"{d:02X}" for d in data])
-    return res
+def _dim_val(val: int) -> str:
+    """Decode a dimmer level. 0 is 100% and 0x7D is 0%."""
+    if val == 0x7D:
+        return "OFF"
+    if val in (0x5A, 0x00):
+        return "ON"
+    if val < 0x7D:
+        return f"{100 - (val * 100 // 0x7D)}%"
+    return f"?{val:02X}"
+
+
+def _rel_val(val: int) -> str:
+    """Decode a relay state. 0x80 on, 0x00 off."""
+    return "ON" if val == 0x80 else "OFF" if val == 0x00 else f"?{val:02X}"
+
+
+CMD_NAMES = {8: "TOGGLE", 9: "SET", 10: "SETTINGS", 11: "STATUS.ACK"}
+"""QS command codes."""
+TYPE_NAMES = {0x81: "RX1DIM", 0x91: "RX1REL"}
+"""QS device type codes, in a STATUS.ACK."""
+
+# Lookup tables indexed by a frame byte, so decoding does not format strings
+_CMD = tuple(CMD_NAMES.get(b, str(b)) for b in range(256))
+_TOGGLE = tuple(
+    "TOGGLE.PING" if b == 2 else "TOGGLE" if b == 5 else f"TOGGLE.{b}"
+    for b in range(256)
+)
+_VAL: dict[int, tuple[str, ...]] = {
+    0x81: tuple(map(_dim_val, range(256))),
+    0x91: tuple(map(_rel_val, range(256))),
+}
+
+
+@dataclass(slots=True)
+class QsFrame:
+    """A QwikSwitch USB hub report. The string forms are computed on use."""
+
+    data: QsMsg
+    cmd: str
+    qid: QsId
+    cnt: int = 0
+    val: int | str | None = None
+    """SET: the level. STATUS.ACK: ON, OFF or a dimmer percentage."""
+    rssi: int | None = None
+    kind: int | None = None
+    """The device type code of a STATUS.ACK."""
+
+    @classmethod
+    def decode(cls, data: QsMsg) -> QsFrame:
+        """Decode a 12 byte QwikSwitch USB hub report."""
+        if data[0] != 0x01 or data[5] != 0x00:
+            _LOG.warning("Unexpected frame: %s", l2s(data))
+        res = cls(data, _CMD[data[1]], (data[2], data[3], data[4]))
+        match data[1]:
+            case 8:
+                res.cmd = _TOGGLE[data[7]]
+                res.cnt = data[6]
+                res.rssi = data[8]
+            case 9:
+                res.cnt = data[6]
+                res.val = data[8]
+            case 11:
+                res.kind = data[8]
+                if vals := _VAL.get(data[8]):
+                    res.val = vals[data[10]]
+                res.rssi = data[6]
+        return res
+
+    @property
+    def id(self) -> str:
+        """The QwikSwitch ID string."""
+        return string_id(self.qid)
+
+    @property
+    def type(self) -> str:
+        """The device type and version of a STATUS.ACK."""
+        if self.kind is None:
+            return ""
+        typ = TYPE_NAMES.get(self.kind) or f"UNKNOWN({self.kind:02X})"
+        return f"{typ}v{self.data[9]}"
+
+    def __str__(self) -> str:
+        """Format for logging."""
+        res = [self.id, self.cmd]
+        if self.kind is not None:
+            res.append(self.type)
+        if self.val is not None:
+            res.append(f"val={self.val}")
+        if self.cmd == "SETTINGS":
+            res.append(f"report=/{self.data[9]}min")
+        if self.rssi is not None:
+            res.append(f"rssi={self.rssi}%")
+        end = 10 if self.data[1] == 8 else len(self.data)  # ignore last 2
+        res.append("x=" + l2s(self.data[6:end], sep="."))
+        return " ".join(res)
@@ -0,0 +1,105 @@
+"""QsUsb transports to record and replay the HID traffic.
+
+A transport has the hid.device methods QsUsb uses: read, write, set_nonblocking
+and close. A capture has one RX frame per line: "<unix time> <hex bytes>".
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from .qwikswitch import QsMsg, l2s, s2l
+
+_LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class Recorder:
+    """Append every frame read from a device to a capture file."""
+
+    dev: Any
+    path: Path
+    _file: IO[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Open the capture file."""
+        self._file = self.path.open("a", encoding="utf-8", buffering=1)
+        _LOG.info("Recording QSUSB frames to %s", self.path)
+
+    def read(self, size: int, timeout_ms: int = 0) -> QsMsg:
+        """Read from the device and record the frame."""
+        data = self.dev.read(size, timeout_ms)
+        if data:  # the QS report, the rest is padding
+            self._file.write(f"{time.time():.6f} {l2s(data[:12])}\n")
+        return data
+
+    def write(self, data: QsMsg) -> Any:
+        """Write to the device."""
+        return self.dev.write(data)
+
+    def set_nonblocking(self, value: int) -> Any:
+        """Set the blocking mode of the device."""
+        return self.dev.set_nonblocking(value)
+
+    def close(self) -> None:
+        """Close the device and the capture file."""
+        self.dev.close()
+        self._file.close()
+
+
+@dataclass
+class Player:
+    """Replay a capture, at `speed` times real time. 0 is as fast as possible."""
+
+    path: Path
+    speed: float = 1.0
+    frames: list[tuple[float, QsMsg]] = field(init=False, repr=False)
+    emitted: list[float] = field(default_factory=list, init=False, repr=False)
+    """perf_counter() when each frame was read."""
+    written: list[QsMsg] = field(default_factory=list, init=False, repr=False)
+    blocking: bool = field(default=False, init=False)
+    _start: float = field(default=0.0, init=False)
+
+    def __post_init__(self) -> None:
+        """Load the capture."""
+        self.frames = []
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            ts, _, data = line.partition(" ")
+            if data:
+                self.frames.append((float(ts), s2l(data)))
+        _LOG.info("Loaded %d frames from %s", len(self.frames), self.path)
+
+    def read(self, size: int, timeout_ms: int = 0) -> QsMsg:
+        """Return the next frame once it is due. Raise EOFError at the end."""
+        idx = len(self.emitted)
+        if idx >= len(self.frames):
+            raise EOFError("End of capture")
+        now = time.perf_counter()
+        if not idx:
+            self._start = now
+        wait = 0.0
+        if self.speed:
+            wait = self._start + (self.frames[idx][0] - self.frames[0][0]) / self.speed
+            wait -= now
+        if wait > 0:
+            if not self.blocking:
+                return []
+            if timeout_ms and wait > timeout_ms / 1000:
+                time.sleep(timeout_ms / 1000)
+                return []
+            time.sleep(wait)
+        self.emitted.append(time.perf_counter())
+        return self.frames[idx][1][:size]
+
+    def write(self, data: QsMsg) -> None:
+        """Collect the frames written."""
+        self.written.append(data)
+
+    def set_nonblocking(self, value: int) -> None:
+        """Set the blocking mode."""
+        self.blocking = not value
+
+    def close(self) -> None:
+        """Close."""
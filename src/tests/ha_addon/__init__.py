@@ -0,0 +1 @@
+"""Tests for the shared HA API helpers."""
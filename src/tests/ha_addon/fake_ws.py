@@ -0,0 +1,31 @@
+"""A fake websocket connection for HaWebsocketBase tests."""
+
+import asyncio
+from typing import Any, cast
+
+from ha_addon.ha_api.ha_websocket import HaWebsocketBase
+
+
+class FakeWs:
+    """Collect the frames sent."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.sent = list[bytes]()
+
+    async def send_frame(self, data: bytes, _: Any) -> None:
+        """Send."""
+        self.sent.append(data)
+
+    async def close(self) -> None:
+        """Close."""
+
+
+def fake_connect(ws: HaWebsocketBase) -> FakeWs:
+    """Connect the API to a FakeWs, authenticated. Close with ws.close()."""
+    fake = FakeWs()
+    ws._ws = cast(Any, fake)
+    ws._ws_id = 0
+    # stands in for the supervisor task
+    ws.running_tasks.append(asyncio.create_task(asyncio.Event().wait()))
+    return fake
@@ -0,0 +1,40 @@
+"""Test the write coalescer."""
+
+from typing import Any
+
+import pytest
+
+from ha_addon.ha_api import SESSIONS, HaRestApi, WriteCoalescer
+from ha_addon.ha_api.types import HAState
+
+
+async def test_coalesce(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Merge, supersede and skip writes."""
+    rest = HaRestApi(token="x")
+    calls = list[tuple[str, dict[str, Any]]]()
+
+    async def _call_service(domain_service: str, data: dict[str, Any]) -> list:
+        calls.append((domain_service, data))
+        return []
+
+    monkeypatch.setattr(rest, "call_service", _call_service)
+    wr = WriteCoalescer(rest=rest, states={"light.d": HAState("light.d", "on")})
+
+    for _ in range(10):  # correction repeated while HA applies it
+        wr.set_entity_state("light.a", "on")
+    wr.set_entity_state("light.b", "on")
+    wr.set_entity_state("light.c", "on")
+    wr.set_entity_state("light.c", "off")  # supersedes on
+    wr.set_entity_state("light.d", "on")  # already on
+    wr.set_entity_state("sensor.e", "on")  # not a light or switch, never called
+    await wr.flush()
+
+    assert sorted(calls) == [
+        ("light.turn_off", {"entity_id": ["light.c"]}),
+        ("light.turn_on", {"entity_id": ["light.a", "light.b"]}),
+    ]
+    assert (wr.commands, wr.calls, wr.saved) == (15, 2, 13)
+    await wr.close()  # cancels the pending timer
+    assert wr._task is None
+    assert len(calls) == 2
+    await SESSIONS.close()
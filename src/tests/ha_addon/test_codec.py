@@ -0,0 +1,64 @@
+"""Micro-benchmark the JSON codecs on HA websocket frames."""
+
+import logging
+import timeit
+
+from ha_addon.ha_api.codec import CODECS
+
+_LOG = logging.getLogger(__name__)
+
+STATE = {
+    "entity_id": "light.kitchen",
+    "state": "on",
+    "attributes": {
+        "supported_color_modes": ["brightness"],
+        "color_mode": "brightness",
+        "brightness": 180,
+        "friendly_name": "Kitchen",
+        "supported_features": 40,
+    },
+    "last_changed": "2026-10-18T06:12:01.123456+00:00",
+    "last_reported": "2026-10-18T06:12:01.123456+00:00",
+    "last_updated": "2026-10-18T06:12:01.123456+00:00",
+    "context": {"id": "01JAB2C3D4E5F6G7H8J9K0", "parent_id": None, "user_id": None},
+}
+FRAMES = [
+    {
+        "id": 5,
+        "type": "event",
+        "event": {
+            "event_type": "state_changed",
+            "data": {
+                "entity_id": "light.kitchen",
+                "old_state": STATE,
+                "new_state": STATE,
+            },
+            "origin": "LOCAL",
+            "time_fired": "2026-10-18T06:12:01.123456+00:00",
+            "context": STATE["context"],
+        },
+    },
+    {
+        "id": 7,
+        "type": "event",
+        "event": {"c": {"light.kitchen": {"+": {"s": "off", "lc": 1760767921.1}}}},
+    },
+    {"id": 8, "type": "result", "success": True, "result": [STATE] * 20},
+]
+
+
+def test_codecs() -> None:
+    """All codecs round-trip the frames. Log frames/s per codec."""
+    raw = [CODECS["json"].dumps(f) for f in FRAMES]
+    for codec in CODECS.values():
+        assert [codec.loads(r) for r in raw] == FRAMES
+        assert [codec.loads(codec.dumps(f)) for f in FRAMES] == FRAMES
+
+        loads = timeit.timeit(lambda c=codec: [c.loads(r) for r in raw], number=200)
+        dumps = timeit.timeit(lambda c=codec: [c.dumps(f) for f in FRAMES], number=200)
+        _LOG.info(
+            "%s: loads %.0f frames/s, dumps %.0f frames/s",
+            codec.name,
+            200 * len(raw) / loads,
+            200 * len(FRAMES) / dumps,
+        )
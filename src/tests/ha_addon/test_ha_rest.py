@@ -0,0 +1,77 @@
+"""Test the HA REST API helper."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from ha_addon.ha_api import SESSIONS, HaRestApi
+
+
+async def test_set_entity_states(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Writes are grouped into one service call per domain."""
+    rest = HaRestApi(token="x")
+    calls = list[tuple[str, dict[str, Any]]]()
+
+    async def _call_service(domain_service: str, data: dict[str, Any]) -> list:
+        calls.append((domain_service, data))
+        return []
+
+    monkeypatch.setattr(rest, "call_service", _call_service)
+    await rest.set_entity_states(
+        ["light.a", "switch.b", "light.c", "sensor.d"], state="on"
+    )
+    assert calls == [
+        ("light.turn_on", {"entity_id": ["light.a", "light.c"]}),
+        ("switch.turn_on", {"entity_id": ["switch.b"]}),
+    ]
+    await SESSIONS.close()
+
+
+async def test_max_parallel() -> None:
+    """The concurrency cap comes from the add-on options."""
+    opt = SimpleNamespace(
+        debug=0, ha_api_url="", ha_api_token="x", ha_api_max_parallel=2
+    )
+    rest = HaRestApi(token="x").set_from_options(opt)
+    assert rest.max_parallel == 2
+    assert rest._sem._value == 2
+    await SESSIONS.close()
+
+
+async def test_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Cache by method+url+body, share in-flight requests, evict LRU."""
+    rest = HaRestApi(token="x", cache_ttl={"api/config": 60, "api/x": 60})
+    rest.cache_size = 2
+    fetched = list[tuple[str, bytes | None]]()
+
+    async def _fetch(method: str, url: str, body: bytes | None, _: Any) -> bytes:
+        fetched.append((url, body))
+        await asyncio.sleep(0.01)
+        return b'{"v": 1}'
+
+    monkeypatch.setattr(rest, "_fetch", _fetch)
+    res = await asyncio.gather(*(rest.get_config() for _ in range(5)))
+    assert res == [{"v": 1}] * 5
+    assert len(fetched) == 1  # in-flight requests shared
+    res[0]["v"] = 2  # type: ignore[index]  # callers get their own copy
+    assert await rest.get_config() == {"v": 1}
+    assert (rest.cache_hits, rest.cache_misses) == (5, 1)
+
+    await rest.request("api/x", {"a": 1}, method="POST")
+    await rest.request("api/x", {"a": 2}, method="POST")  # evicts api/config
+    await rest.request("api/x", {"a": 1}, method="POST")
+    await rest.get_config()
+    await rest.is_running()  # not cached
+    assert [u.rpartition("/api/")[2] for u, _ in fetched] == [
+        "config",
+        "x",
+        "x",
+        "config",
+        "",
+    ]
+    assert (rest.cache_hits, rest.cache_misses) == (6, 4)
+    rest.cache_clear()
+    await rest.get_config()
+    assert rest.cache_misses == 5
@@ -0,0 +1,229 @@
+"""Test the HA websocket API helper."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from ha_addon.ha_api import SESSIONS, HaWebsocketApi
+from ha_addon.ha_api.types import HAState
+
+from .fake_ws import fake_connect
+
+
+async def test_state_mirror() -> None:
+    """Apply subscribe_entities events to the state mirror."""
+    ws = HaWebsocketApi(token="x")
+    await ws.handle_entities(
+        {
+            "a": {
+                "light.a": {"s": "on", "a": {"brightness": 100}, "c": "c1", "lc": 0},
+                "light.b": {"s": "off", "a": {}, "c": "c2", "lc": 0, "lu": 1},
+            }
+        }
+    )
+    st = await ws.get_state("light.a")
+    assert st and st.state == "on"
+    assert st.context == {"id": "c1"}
+    assert st.last_changed == st.last_updated == "1970-01-01T00:00:00+00:00"
+
+    await ws.handle_entities(
+        {
+            "c": {
+                "light.a": {"+": {"s": "off", "lc": 2}, "-": {"a": ["brightness"]}},
+                "light.x": {"+": {"s": "on"}},
+            },
+            "r": ["light.b"],
+        }
+    )
+    st = await ws.get_state("light.a")
+    assert st and st.state == "off"
+    assert st.attributes == {}
+    assert st.last_updated == "1970-01-01T00:00:02+00:00"
+    assert await ws.get_state("light.b") is None
+    assert list(ws.states) == ["light.a"]
+    await SESSIONS.close()
+
+
+async def test_event_queue_drop_oldest() -> None:
+    """Events queue per subscription and drop the oldest, unless unbounded."""
+    ws = HaWebsocketApi(token="x", event_queue_size=2)
+    seen = list[int]()
+
+    async def _handler(event: dict[str, Any]) -> None:
+        seen.append(event["n"])
+
+    ws.ws_event_handlers[1] = _handler
+    for num in range(5):
+        await ws.handle_event({"id": 1, "type": "event", "event": {"n": num}})
+    eq = ws.ws_event_queues[1]
+    assert (eq.depth, eq.dropped) == (2, 3)
+
+    await asyncio.sleep(0)  # let the worker drain the queue
+    assert seen == [3, 4]
+    assert eq.depth == 0
+
+    ws.ws_event_handlers[2] = _handler
+    ws.ws_queue_sizes[2] = 0  # e.g. the state mirror, never drop
+    for num in range(5):
+        await ws.handle_event({"id": 2, "type": "event", "event": {"n": num}})
+    assert (ws.ws_event_queues[2].depth, ws.ws_event_queues[2].dropped) == (5, 0)
+    for task in ws.running_tasks:
+        task.cancel()
+    await SESSIONS.close()
+
+
+async def test_request_many() -> None:
+    """Pipeline requests, yield results as they arrive, time out the rest."""
+    ws = HaWebsocketApi(token="x")
+    fake = fake_connect(ws)
+
+    def _sent() -> list[dict[str, Any]]:
+        return [ws.codec.loads(m) for m in fake.sent]
+
+    async def _collect() -> list[tuple[int, Any]]:
+        msgs = [{"type": "a"}, {"type": "b"}, {"type": "c"}]
+        return [
+            (idx, res and res["result"])
+            async for idx, res in ws.request_many(msgs, timeout=0.05)
+        ]
+
+    task = asyncio.create_task(_collect())
+    await asyncio.sleep(0.01)
+    assert [m["id"] for m in _sent()] == [1, 2, 3]
+    await ws.handle_result({"id": 3, "type": "result", "success": True, "result": "c"})
+    await ws.handle_result({"id": 1, "type": "result", "success": True, "result": "a"})
+
+    assert await task == [(2, "c"), (0, "a"), (1, None)]
+    assert not ws.ws_result_waiters
+    assert not ws._deadlines and ws._deadline_timer is None
+
+    async def _send_frame(data: bytes, _: Any) -> None:
+        raise ConnectionResetError("closing")
+
+    fake.send_frame = _send_frame  # type: ignore[method-assign]
+    assert await ws.request_result(type="d") is None
+    assert not ws.ws_result_waiters
+    await ws.close()
+    await SESSIONS.close()
+
+
+async def test_resubscribe() -> None:
+    """Replay subscriptions after a reconnect, keep the handles, resync the mirror."""
+    ws = HaWebsocketApi(token="x", event_queue_size=0)
+    fake = fake_connect(ws)
+    await ws.handle_auth_ok({})
+
+    def _sent() -> list[dict[str, Any]]:
+        return [ws.codec.loads(m) for m in fake.sent]
+
+    await ws.handle_entities({"a": {e: {"s": "on"} for e in ("a", "b", "c")}})
+    h_old = await ws.subscribe_events("call_service", ws.handle_entities)
+    h_evt = await ws.subscribe_events("state_changed", ws.handle_entities)
+    h_ent = await ws.subscribe_entities(["a", "b"])
+    pending = asyncio.create_task(ws.request_result(type="get_states", timeout=5))
+    await asyncio.sleep(0)
+    assert ws.subscription_ids == {h_old: 1, h_evt: 2, h_ent: 3}
+    assert h_old is not None
+    await ws.unsubscribe_events(h_old)
+
+    ws._disconnected()
+    assert await pending is None
+    assert not ws.connected and not ws.ws_event_handlers
+
+    fake.sent.clear()
+    await ws.handle_auth_ok({})
+    assert _sent() == [
+        {"type": "subscribe_events", "event_type": "state_changed", "id": 1},
+        {"type": "subscribe_entities", "entity_ids": ["a", "b"], "id": 2},
+    ]
+    assert ws.subscription_ids == {h_evt: 1, h_ent: 2}  # same handles, new ids
+    assert ws.connected
+
+    # "b" was removed while disconnected, "c" is not in this subscription
+    await ws.handle_event({"id": 2, "type": "event", "event": {"a": {"a": {}}}})
+    assert ws.states.keys() == {"a", "c"}
+
+    assert h_ent is not None
+    await ws.unsubscribe_events(h_ent)
+    assert _sent()[-1] == {"type": "unsubscribe_events", "event_id": 2, "id": 3}
+    assert list(ws.subscriptions) == [h_evt]
+    await ws.close()
+    await SESSIONS.close()
+
+
+async def test_resync_states(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reload the mirror after a reconnect, pass on the states that changed."""
+    ws = HaWebsocketApi(token="x")
+    fake_connect(ws)
+    await ws.handle_auth_ok({})
+    await ws.handle_entities({"a": {e: {"s": "on"} for e in ("a", "b", "c")}})
+    changed = list[str]()
+
+    async def _request_result(**_: Any) -> dict[str, Any]:
+        res = [{"entity_id": "a", "state": "on"}, {"entity_id": "b", "state": "off"}]
+        return {"success": True, "result": res}
+
+    async def _on_resync(states: list[HAState]) -> None:
+        changed.extend(f"{st.entity_id}={st.state}" for st in states)
+
+    monkeypatch.setattr(ws, "request_result", _request_result)
+    ws.on_resync = _on_resync
+    ws._disconnected()
+    await ws.handle_auth_ok({})
+    await ws.running_tasks[-1]
+    assert changed == ["b=off"]
+    assert ws.states.keys() == {"a", "b"}  # c was removed while disconnected
+    await ws.close()
+    await SESSIONS.close()
+
+
+async def test_auth_invalid(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Stop reconnecting when the token is rejected, and tell the owner."""
+    ws = HaWebsocketApi(token="x")
+    fake_connect(ws)
+    ping = ws.running_tasks[0]
+
+    async def _ws_loop() -> None:
+        await ws.handle_auth_invalid({})
+
+    monkeypatch.setattr(ws, "ws_loop", _ws_loop)
+    await asyncio.wait_for(ws.ws_supervisor(), 1)
+    await asyncio.wait_for(ws.wait_stopped(), 1)
+    assert ws.auth_failed and not ws.connected
+    assert not ws.running_tasks  # connect_rest_ws may start it again
+    await asyncio.sleep(0)
+    assert ping.cancelled()
+    await ws.close()
+    await SESSIONS.close()
+
+
+async def test_registry_by_label(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without search/related, find labelled entities in the display registry."""
+    ws = HaWebsocketApi(token="x")
+    sent = list[str]()
+    results: dict[str, Any] = {
+        "search/related": None,
+        "config/entity_registry/list_for_display": {
+            "entities": [
+                {"ei": "sensor.a", "pl": "template", "lb": ["cg"]},
+                {"ei": "sensor.b", "pl": "template"},
+                {"ei": "sensor.c", "pl": "mqtt", "lb": ["cg"]},
+            ]
+        },
+        "config/entity_registry/get_entries": {
+            "sensor.a": {"entity_id": "sensor.a", "platform": "template", "x": 1}
+        },
+    }
+
+    async def _request_result(**msg: Any) -> dict[str, Any] | None:
+        sent.append(msg["type"])
+        if "entity_ids" in msg:
+            assert msg["entity_ids"] == ["sensor.a"]  # labelled & template
+        res = results[msg["type"]]
+        return res and {"success": True, "result": res}
+
+    monkeypatch.setattr(ws, "request_result", _request_result)
+    ents = await ws.get_entity_registry(label="cg", platform="template")
+    assert [e.entity_id for e in ents] == ["sensor.a"]
+    assert sent == list(results)
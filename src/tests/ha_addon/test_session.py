@@ -0,0 +1,55 @@
+"""Benchmark REST latency with cold and warm connections."""
+
+import logging
+import statistics
+import time
+
+from aiohttp import ClientSession, web
+
+from ha_addon.ha_api import SESSIONS, HaRestApi
+
+_LOG = logging.getLogger(__name__)
+
+
+async def test_shared_session() -> None:
+    """Share one session per loop, reuse connections."""
+
+    async def _api(_: web.Request) -> web.Response:
+        return web.json_response({"message": "API running."})
+
+    app = web.Application()
+    app.router.add_get("/api/", _api)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"  # type: ignore[union-attr]
+
+    rest = HaRestApi(url=url, token="x")
+    assert rest.ses is SESSIONS.get() is HaRestApi(token="y").ses
+    await rest.close()
+    assert not rest.ses.closed  # owned by SESSIONS
+
+    async def _cold() -> None:  # a new session per request, as ESP.query did
+        async with ClientSession() as ses, ses.get(url + "api/") as res:
+            await res.json()
+
+    async def _warm() -> None:
+        await rest.request("api/", None)
+
+    for name, func in (("cold", _cold), ("warm", _warm)):
+        times = list[float]()
+        for _ in range(50):
+            start = time.perf_counter()
+            await func()
+            times.append(time.perf_counter() - start)
+        _LOG.info(
+            "%s connection: p50 %.2fms p99 %.2fms",
+            name,
+            statistics.median(times) * 1e3,
+            statistics.quantiles(times, n=100)[98] * 1e3,
+        )
+
+    await SESSIONS.close()
+    assert rest.ses.closed
+    await runner.cleanup()
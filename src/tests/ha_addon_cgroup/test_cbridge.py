@@ -1 +1,302 @@
 """Test helpers."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Coroutine
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from mqtt_entity import MQTTDevice
+
+from ha_addon.ha_api import SESSIONS, HaRestApi, HaWebsocketApi
+from ha_addon.ha_api.types import HAEntity, HAState
+from ha_addon_control_group import cbridge
+from ha_addon_control_group.cbridge import (
+    ACHANGE,
+    AddonState,
+    CGroupBridge,
+    Strategy,
+    plan_subscription,
+)
+from ha_addon_control_group.options import API
+from ha_addon_control_group.options_discover import ControlGroupOptions
+from ha_addon_control_group.options_file import OPT_FILE
+from tests.ha_addon.fake_ws import fake_connect
+
+_LOG = logging.getLogger(__name__)
+
+
+async def _count_wakeups(
+    run: Callable[[], Coroutine[Any, Any, Any]], seconds: float
+) -> int:
+    """Count event loop wakeups (selector returns) while `run` is active."""
+    loop = asyncio.get_running_loop()
+    selector = loop._selector  # type: ignore[attr-defined]
+    select = selector.select
+    count = 0
+
+    def _select(timeout: float | None = None) -> Any:
+        nonlocal count
+        count += 1
+        return select(timeout)
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0.01)  # let it settle
+    selector.select = _select
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        selector.select = select
+        task.cancel()
+    return count
+
+
+async def test_main_loop_idle_wakeups() -> None:
+    """The main loop does not wake up while idle, but does run on a change."""
+    state = AddonState()
+
+    async def _poll() -> None:  # the previous main loop
+        while True:
+            await asyncio.sleep(0.02)
+            await state.run_loop()
+
+    seconds = 0.2
+    idle = await _count_wakeups(asyncio.Event().wait, seconds)  # our own sleep
+    polled = await _count_wakeups(_poll, seconds) - idle
+    evented = await _count_wakeups(state.run_forever, seconds) - idle
+    _LOG.info(
+        "Idle wakeups/minute: polling(20ms)=%.0f event-driven=%.0f",
+        polled * 60 / seconds,
+        evented * 60 / seconds,
+    )
+    assert polled >= 5
+    assert evented == 0
+    assert state.wakeups == 0
+
+    task = asyncio.create_task(state.run_forever())
+    await asyncio.sleep(0)
+    ACHANGE.set()
+    await asyncio.sleep(0)
+    assert state.wakeups == 1
+    assert not ACHANGE.is_set()
+    task.cancel()
+
+
+def _groups(count: int) -> list[CGroupBridge]:
+    """Create groups with a source sensor and 10 lights each."""
+    return [
+        CGroupBridge(
+            opt=ControlGroupOptions(
+                id=f"g{gi}",
+                src_entity=f"sensor.g{gi}",
+                entities=[f"light.e{gi * 10 + ei}" for ei in range(10)],
+            ),
+            state="on",
+        )
+        for gi in range(count)
+    ]
+
+
+async def test_route_index() -> None:
+    """Route a state change via the entity index. Log per-event cost."""
+    cgs = _groups(500)
+    state = AddonState()
+    state.set_groups(cgs)
+    assert len(state.targets) == 5000
+    assert state.targets["light.e4321"] == [cgs[432]]
+    assert state.sources["sensor.g7"] == [cgs[7]]
+
+    async def _linear(eid: str, st: str, _: dict[str, Any]) -> None:  # before
+        for cg in state.cgs:
+            if eid == cg.opt.src_entity or st == cg.state:
+                continue
+            if eid in cg.opt.entities:
+                pass
+
+    events = [f"light.e{idx}" for idx in range(0, 5000, 50)]
+    for name, route in (("linear", _linear), ("index", state.route)):
+        start = time.perf_counter()
+        for eid in events:
+            await route(eid, "on", {})
+        _LOG.info(
+            "%s routing: %.1fus/event",
+            name,
+            (time.perf_counter() - start) / len(events) * 1e6,
+        )
+
+
+def _frame(strategy: Strategy, sub_id: int, eid: str) -> bytes:
+    """Encode a state change to "on" as HA sends it for the strategy."""
+    st = {"entity_id": eid, "state": "on"}
+    event: dict[str, Any] = {
+        "trigger": {"variables": {"trigger": {"entity_id": eid, "to_state": st}}},
+        "entities": {"c": {eid: {"+": {"a": {"x": 1}, "lu": 1.0}}}},  # attributes
+        "events": {"event_type": "state_changed", "data": {"entity_id": eid}},
+    }[strategy]
+    if strategy == "events":
+        event["data"] |= {"old_state": st, "new_state": st}
+    return API.ws.codec.dumps({"id": sub_id, "type": "event", "event": event})
+
+
+async def test_subscription_strategies(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Subscribe with each strategy. Log subscribe cost & event throughput."""
+    assert plan_subscription(100, 10_000) == "trigger"
+    assert plan_subscription(5_000, 20_000) == "entities"
+    assert plan_subscription(5_000, 8_000) == "events"
+
+    state = AddonState()
+    state.set_groups(_groups(200))  # 2200 of 10k HA entities
+    total = 10_000
+    changes = [f"light.e{idx % total}" for idx in range(0, 4 * total, 7)]
+    routed = list[str]()
+
+    async def _route(eid: str, st: str, _: dict[str, Any]) -> None:
+        routed.append(eid)
+
+    monkeypatch.setattr(state, "route", _route)
+
+    strategies: tuple[Strategy, ...] = ("trigger", "entities", "events")
+    for strategy in strategies:
+        ws = HaWebsocketApi(token="x", event_queue_size=0)
+        fake = fake_connect(ws)
+        monkeypatch.setattr(API, "ws", ws)
+        if strategy == "entities":  # the stream starts with all the states
+            await ws.handle_entities({"a": {e: {"s": "on"} for e in state.targets}})
+
+        start = time.perf_counter()
+        assert await state.subscribe_changes(strategy) == strategy
+        sub_time = time.perf_counter() - start
+        sent = fake.sent
+        sub_id = ws.subscription_ids[max(ws.subscriptions)]  # the routing one
+        # HA only sends the watched changes, except for "events"
+        frames = [
+            _frame(strategy, sub_id, eid)
+            for eid in changes
+            if strategy == "events" or eid in state.targets
+        ]
+
+        routed.clear()
+        start = time.perf_counter()
+        for frame in frames:
+            await ws.handle_event(ws.codec.loads(frame))
+        elapsed = time.perf_counter() - start
+        assert routed == [e for e in changes if e in state.targets]
+        assert ws.states[routed[0]].state == "on"  # the mirror is current
+        # one stream per strategy
+        assert len(sent) == {"trigger": 9, "entities": 1, "events": 1}[strategy]
+        _LOG.info(
+            "%s: subscribe %d msgs %.0fkB %.1fms | %d frames %.0fkB -> %.0f changes/s",
+            strategy,
+            len(sent),
+            sum(map(len, sent)) / 1e3,
+            sub_time * 1e3,
+            len(frames),
+            sum(map(len, frames)) / 1e3,
+            len(routed) / elapsed,
+        )
+        await ws.close()
+        await SESSIONS.close()
+
+
+async def test_rediscover_groups(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Add, update and remove only the groups of the changed helpers."""
+    helpers = {"sensor.a_state", "sensor.b_state"}
+    friendly = {"sensor.a_state": "A", "sensor.b_state": "B"}
+
+    async def _entries(eids: list[str]) -> list[HAEntity]:
+        return [
+            HAEntity(e, "template", labels=["control_group"], config_entry_id=e)
+            for e in eids
+            if e in helpers
+        ]
+
+    async def _get_state(eid: str) -> HAState:
+        return HAState(eid, "on", attributes={"friendly_name": friendly.get(eid)})
+
+    async def _template(entry_id: str) -> str:
+        return entry_id
+
+    class FakeMqtt:
+        def __init__(self) -> None:
+            self.published = 0
+            self.unsubscribed = list[str]()
+
+        async def publish(self, *_: Any, **__: Any) -> None:
+            pass
+
+        async def publish_discovery_info(self) -> None:
+            self.published += 1
+
+        def topic_unsubscribe(self, topic: str) -> None:
+            self.unsubscribed.append(topic)
+
+    ws = HaWebsocketApi(token="x")
+    fake_connect(ws)
+    monkeypatch.setattr(ws, "get_entity_registry_entries", _entries)
+    rest = HaRestApi(token="x")
+    monkeypatch.setattr(rest, "get_state", _get_state)
+    monkeypatch.setattr(rest, "get_config_entry_template", _template)
+    monkeypatch.setattr(OPT_FILE, "groups", {})
+    monkeypatch.setattr(OPT_FILE, "path", tmp_path / "state.json")
+    mqtt = FakeMqtt()
+    for attr, val in (
+        ("ws", ws),
+        ("rest", rest),
+        ("mqtt", mqtt),
+        ("opt", SimpleNamespace(ha_prefix="cg")),
+    ):
+        monkeypatch.setattr(API, attr, val, raising=False)
+
+    state = AddonState()
+    state.dev = MQTTDevice(identifiers=["cg"], components={})
+    await state.rediscover_groups({"sensor.a_state"})
+    assert [cg.opt.id for cg in state.cgs] == ["a_state"]
+    assert list(state.dev.components) == ["a_state"]
+    assert state.cgs[0].state == "on"  # rendered
+    assert state.sources.keys() == {"sensor.a_state"}
+    assert ws.states.keys() == {"light.a"}  # the new target is in the mirror
+    cg_a = state.cgs[0]
+
+    await state.rediscover_groups({"sensor.a_state", "sensor.b_state"})
+    assert state.cgs == [cg_a, state.cgs[1]]  # a unchanged
+    assert mqtt.published == 2
+
+    friendly["sensor.b_state"] = "B renamed"  # updated
+    helpers.remove("sensor.a_state")  # label removed
+    await state.rediscover_groups({"sensor.a_state", "sensor.b_state"})
+    assert [cg.name for cg in state.cgs] == ["B renamed"]
+    assert list(state.dev.components) == ["b_state"]
+    assert state.dev.remove_components == {"a_state": "select"}
+    assert mqtt.unsubscribed == ["cg/cg/a_state_set"]
+    assert state.sources.keys() == {"sensor.b_state"}
+    assert OPT_FILE.groups.keys() == {"b_state"}  # a pruned
+
+    await state.rediscover_groups({"sensor.x"})  # nothing to do
+    assert mqtt.published == 3
+    await OPT_FILE.flush()
+    await ws.close()
+    await SESSIONS.close()
+
+
+async def test_rediscover_in_rounds(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Registry changes during a rediscovery wait for the next round."""
+    state = AddonState()
+    rounds = list[set[str]]()
+
+    async def _rediscover_groups(eids: set[str]) -> None:
+        rounds.append(eids)
+        state.rediscover({"sensor.b"} if len(rounds) == 1 else set())
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(cbridge, "REDISCOVER_DELAY", 0)
+    monkeypatch.setattr(state, "rediscover_groups", _rediscover_groups)
+    state.rediscover({"sensor.a"})
+    assert state._rediscover_task
+    await state._rediscover_task
+    assert rounds == [{"sensor.a"}, {"sensor.b"}]
+    assert state._rediscover_task is None
@@ -1,5 +1,18 @@
 """Tests for control-group discovery loading."""
 
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+
+from ha_addon.ha_api import HaRestApi
+from ha_addon.ha_api.types import HAEntity
+from ha_addon_control_group.options_discover import discover_control_groups
+
 # from __future__ import annotations
 
 # from collections.abc import Generator
@@ -215,3 +228,73 @@
 
 #     with pytest.raises(ValueError, match="reserved"):
 #         await opt.init_addon()
+
+
+async def test_discovery_pipeline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fetch states & registry together, templates with bounded parallelism."""
+    count = 40
+    rest = HaRestApi(token="x", max_parallel=8)
+    active = max_active = 0
+    stages = set[str]()  # in flight
+    overlap = False
+
+    @asynccontextmanager
+    async def _request(
+        method: str, url: str, data: bytes | None = None, **_: Any
+    ) -> AsyncIterator[Any]:
+        nonlocal active, max_active, overlap
+        active += 1
+        max_active = max(max_active, active)
+        stages.add(url)
+        await asyncio.sleep(0.02)
+        overlap |= "registry" in stages
+        stages.discard(url)
+        active -= 1
+        if url.endswith("api/states"):
+            res: Any = [
+                {"entity_id": f"sensor.g{i}_state", "state": "on"} for i in range(count)
+            ]
+        else:
+            handler = rest.codec.loads(data or b"{}")["handler"]
+            res = {"data_schema": [{"description": {"suggested_value": handler}}]}
+
+        async def _read() -> bytes:
+            return rest.codec.dumps(res)
+
+        yield SimpleNamespace(status=200, read=_read)
+
+    monkeypatch.setattr(rest, "ses", SimpleNamespace(request=_request))
+
+    @dataclass
+    class FakeWs:
+        label: str | None = None
+
+        async def get_entity_registry(
+            self, label: str | None = None, platform: str | None = None
+        ) -> list:
+            nonlocal overlap
+            self.label = label
+            stages.add("registry")
+            await asyncio.sleep(0.02)
+            overlap |= any(s.endswith("api/states") for s in stages)
+            stages.discard("registry")
+            return [
+                HAEntity(
+                    entity_id=f"sensor.g{i}_state",
+                    platform="template",
+                    labels=["control_group"],
+                    config_entry_id=f"entry{i}",
+                )
+                for i in range(count + 1)  # the last helper has no state
+            ]
+
+    async def _connect() -> None:
+        pass
+
+    api = SimpleNamespace(rest=rest, ws=FakeWs(), connect_rest_ws=_connect)
+    groups = await discover_control_groups(cast(Any, api))
+
+    assert [g.template for g in groups] == [f"entry{i}" for i in range(count)]
+    assert api.ws.label == "control_group"
+    assert max_active == 8  # templates with bounded parallelism
+    assert overlap  # states & registry were fetched together
@@ -1,6 +1,8 @@
 """Test helpers."""
 
-from ha_addon.helpers import onoff
+from pathlib import Path
+
+from ha_addon.helpers import JsonStore, onoff
 
 
 def test_onoff() -> None:
@@ -12,3 +14,19 @@ def test_onoff() -> None:
     assert onoff("off") == "off"
     assert onoff("0") == "off"
     assert onoff("1") == "on"
+
+
+async def test_json_store(tmp_path: Path) -> None:
+    """Save compact JSON atomically, skip unchanged content."""
+    store = JsonStore(tmp_path / "share" / "state.json")
+    assert await store.load() is None
+    assert await store.save({"a": [1, 2]})
+    assert store.path.read_text() == '{"a":[1,2]}'
+    assert not await store.save({"a": [1, 2]})
+    assert store.writes == 1
+
+    store = JsonStore(store.path)  # after a restart
+    assert await store.load() == {"a": [1, 2]}
+    assert not await store.save({"a": [1, 2]})
+    assert await store.save({"a": [1]})
+    assert list(store.path.parent.iterdir()) == [store.path]
@@ -0,0 +1,39 @@
+"""Test the persistent options file."""
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+
+from ha_addon_control_group.cbridge import MODE_OPTIONS, CGroupBridge
+from ha_addon_control_group.options_discover import ControlGroupOptions
+from ha_addon_control_group.options_file import OPT_FILE
+
+
+async def test_debounced_save(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """1000 rapid mode changes result in one atomic write."""
+    path = tmp_path / "config" / "state.json"
+    monkeypatch.setattr(OPT_FILE, "path", path)
+    monkeypatch.setattr(OPT_FILE, "delay", 0.05)
+    writes = OPT_FILE.writes
+
+    cg = CGroupBridge(opt=ControlGroupOptions(id="g1"))
+    cg.mode_entity = cast(Any, SimpleNamespace(options=MODE_OPTIONS))
+    for idx in range(1000):
+        cg.mode = MODE_OPTIONS[idx % len(MODE_OPTIONS)]
+    assert not path.exists()
+
+    await asyncio.sleep(0.1)
+    assert OPT_FILE.writes - writes == 1
+    assert json.loads(path.read_text())["groups"]["g1"] == {"mode": cg.mode}
+    assert list(path.parent.iterdir()) == [path]  # no temp file left
+
+    cg.mode = "on"
+    await OPT_FILE.flush()  # on shutdown
+    assert OPT_FILE.writes - writes == 2
+    assert json.loads(path.read_text())["groups"]["g1"] == {"mode": "on"}
+    await OPT_FILE.flush()  # nothing pending
+    assert OPT_FILE.writes - writes == 2
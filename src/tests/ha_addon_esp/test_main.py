@@ -1,8 +1,23 @@
 """Test ESP addon."""
 
 from dataclasses import asdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+from jmespath.exceptions import JMESPathError
+from mqtt_entity import MQTTDevice
 
 from ha_addon_esp.__main__ import Options
+from ha_addon_esp.esp import (
+    MIN_WAIT,
+    SAST,
+    JMESSensor,
+    SensorOptions,
+    next_wait,
+    refresh_areas,
+)
 
 
 def test_load_esp() -> None:
@@ -27,4 +42,88 @@ def test_load_esp() -> None:
         "mqtt_port": 1883,
         "mqtt_username": "",
         "search_area": "",
+        "sensors": [],
     }
+
+
+def test_load_sensors() -> None:
+    """Load user-defined sensors."""
+    opt = Options()
+    opt.load_dict(
+        {
+            "areas": [],
+            "SENSORS": [{"NAME": "Second", "STATE_EXPR": "events[1].start"}],
+        }
+    )
+    assert opt.sensors == [SensorOptions(name="Second", state_expr="events[1].start")]
+
+
+async def test_jmes_sensor() -> None:
+    """Compile once, publish only changes."""
+    sen = JMESSensor(name="Next", state_expr="events[0].start", attr_expr="events[0]")
+    sen.init_entity(MQTTDevice(identifiers=["esp"], components={}), "esp")
+    published = list[tuple[str, str]]()
+
+    class FakeClient:
+        async def publish(self, topic: str, payload: str, **_: Any) -> None:
+            published.append((topic.rpartition("/")[2], payload))
+
+    esp = SimpleNamespace(
+        client=FakeClient(), state={"events": [{"start": "10:00", "end": "12:00"}]}
+    )
+    assert await sen.get_state(cast(Any, esp)) == "10:00"
+    assert await sen.get_state(cast(Any, esp)) == "10:00"
+    assert [t for t, _ in published] == ["state", "attributes"]
+    esp.state["events"][0]["end"] = "12:30"
+    await sen.get_state(cast(Any, esp))
+    assert len(published) == 4
+
+    with pytest.raises(JMESPathError):
+        JMESSensor(name="Bad", state_expr="events[")
+
+
+def test_next_wait() -> None:
+    """Spread the remaining quota over the day."""
+    noon = datetime(2026, 10, 18, 12, tzinfo=SAST)
+    assert next_wait({}, 1, noon) == 3600
+    assert next_wait({"count": 26, "limit": 50}, 1, noon) == 12 * 3600 / 24
+    assert next_wait({"count": 26, "limit": 50}, 2, noon) == 3600
+    assert next_wait({"count": 0, "limit": 50}, 1, noon) == MIN_WAIT
+    assert next_wait({"count": 49, "limit": 50}, 2, noon) == 12 * 3600 + 60
+
+
+async def test_refresh_areas() -> None:
+    """Refresh concurrently, one allowance fetch per API key."""
+    queries = list[str]()
+    refreshed = list[str]()
+
+    class FakeEsp(SimpleNamespace):
+        async def query(self, uri: str, _: dict) -> dict:
+            queries.append(self.api_key)
+            return {"allowance": {"count": 10, "limit": 50}}
+
+        async def callback(self, _: Any) -> None:
+            refreshed.append(self.area)
+            if self.area == "bad":
+                raise ValueError("boom")
+
+        async def init(self) -> None:
+            refreshed.append(self.area)
+
+    devs = [
+        FakeEsp(api_key="k1", area="a", client=None, state={}),
+        FakeEsp(api_key="k1", area="bad", client=None, state={}),
+        FakeEsp(api_key="k2", area="c", client=None, state={}),
+    ]
+    wait = await refresh_areas(cast(Any, devs))
+    assert queries == ["k1", "k2"]
+    assert refreshed == ["a", "bad", "c"]
+    assert devs[1].allowance == {"count": 12, "limit": 50}  # incl. this refresh
+    assert devs[2].allowance == {"count": 11, "limit": 50}
+    assert MIN_WAIT <= wait <= 24 * 3600 / 19  # k1: 38 left, 2 per refresh
+
+    # init with a state history does not query the areas
+    devs[0].state = devs[1].state = {"events": []}
+    await refresh_areas(cast(Any, devs), init=True)
+    assert devs[0].allowance == {"count": 10, "limit": 50}
+    assert devs[2].allowance == {"count": 11, "limit": 50}
@@ -0,0 +1,65 @@
+"""Test the HassBridge."""
+
+import logging
+import random
+import time
+
+import pytest
+
+from ha_addon_qsusb64.addon.bridge import HassBridge
+from ha_addon_qsusb64.addon.options import OPT, ButtonOpt, DeviceOpt
+from ha_addon_qsusb64.qwikswitch import string_id
+
+_LOG = logging.getLogger(__name__)
+
+
+def _qid(idx: int) -> str:
+    return string_id((0x10, idx >> 8, idx & 0xFF))
+
+
+async def test_find_ids(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Route a button storm on 64 devices & 200 buttons. Log the cost per frame."""
+    kinds = ("dim", "rel", "imod")
+    monkeypatch.setattr(
+        OPT,
+        "lights",
+        [DeviceOpt(id=_qid(i), kind=kinds[i % 3], name=f"L{i}") for i in range(48)],
+    )
+    monkeypatch.setattr(
+        OPT, "switches", [DeviceOpt(id=_qid(i), name=f"S{i}") for i in range(48, 64)]
+    )
+    monkeypatch.setattr(
+        OPT,
+        "buttons",
+        [
+            ButtonOpt(name=f"B{b}", buttons=[_qid(1000 + b * 4 + i) for i in range(4)])
+            for b in range(50)
+        ],
+    )
+    monkeypatch.setattr(OPT, "ignore", [DeviceOpt(id=_qid(2000))])
+    hass = HassBridge(qs_write=lambda _: None)
+    assert len(hass.routes) == 264
+
+    [(ent, br)] = hass.find_ids(_qid(1005))
+    assert br is hass.bridges[1] and ent is br.find_entity(_qid(1005))
+    light = hass.bridges[50 + 3]  # after the button bridges
+    assert hass.find_ids(_qid(3)) == [(light.find_entity(_qid(3)), light)]
+    assert hass.find_ids(_qid(2000)) == []  # ignored
+    assert hass.find_ids(_qid(2001)) == []
+
+    def _linear(qid: str) -> list:  # before
+        res = [(b, br) for br in hass.bridges if (b := br.find_entity(qid))]
+        if not res:
+            _ = qid in [i.id for i in OPT.ignore]
+        return res
+
+    rnd = random.Random(1)
+    storm = [_qid(rnd.randrange(1000, 1200)) for _ in range(5000)]
+    storm += [_qid(2000)] * 100
+    for name, find in (("linear", _linear), ("index", hass.find_ids)):
+        start = time.perf_counter()
+        for qid in storm:
+            find(qid)
+        _LOG.info(
+            "%s: %.2fus/frame", name, (time.perf_counter() - start) / len(storm) * 1e6
+        )
@@ -0,0 +1,175 @@
+"""Test the QsUsb HID interface with a fake device."""
+
+import asyncio
+import logging
+import queue
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+from ha_addon_qsusb64.addon.options import OPT
+from ha_addon_qsusb64.bench import bench, synthetic
+from ha_addon_qsusb64.qsusb import QsUsb, QsWriter
+from ha_addon_qsusb64.qwikswitch import QsMsg, qs_encode, string_id
+from ha_addon_qsusb64.transport import Player
+
+_LOG = logging.getLogger(__name__)
+
+FRAME = [1, 8, 0x12, 0x34, 0x56, 0, 1, 5, 90, 0, 0, 0]
+
+
+class FakeHid:
+    """A HID device fed from a thread-safe queue."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.rx = queue.Queue[QsMsg]()
+        self.tx = list[QsMsg]()
+        self.blocking = False
+
+    def set_nonblocking(self, value: int) -> None:
+        """Set the blocking mode."""
+        self.blocking = not value
+
+    def read(self, size: int, timeout_ms: int = 0) -> QsMsg:
+        """Read a frame, padded to 64 bytes like the QS modem."""
+        try:
+            if self.blocking:
+                data = self.rx.get(timeout=timeout_ms / 1000 if timeout_ms else None)
+            else:
+                data = self.rx.get_nowait()
+        except queue.Empty:
+            return []
+        return (data + [0] * 64)[:size]
+
+    def write(self, data: QsMsg) -> None:
+        """Write a frame."""
+        self.tx.append(data)
+
+    def close(self) -> None:
+        """Close."""
+
+
+async def _latency(qs: QsUsb, fake: FakeHid, threaded: bool, count: int) -> list[float]:
+    """Measure the time from a frame arriving on the device to the main loop."""
+    sent = list[float]()
+    latency = list[float]()
+
+    async def _loop() -> None:
+        while len(latency) < count:
+            if threaded:
+                frames = await qs.read_all()
+            else:  # the previous main loop
+                frames = [data] if (data := qs.read()) else []
+                await asyncio.sleep(0.1)
+            latency.extend(time.perf_counter() - sent[len(latency)] for _ in frames)
+
+    task = asyncio.create_task(_loop())
+    for idx in range(count):
+        await asyncio.sleep(0.01 + idx % 7 * 0.01)
+        sent.append(time.perf_counter())
+        fake.rx.put(FRAME)
+    await asyncio.wait_for(task, 10)
+    return latency
+
+
+async def test_reader_thread() -> None:
+    """Frames reach the event loop without polling. Log the latency."""
+    fake = FakeHid()
+    qs = QsUsb(dev=fake, read_timeout=50)
+
+    for name, threaded in (("polling(100ms)", False), ("thread", True)):
+        if threaded:
+            qs.start_reader()
+            assert fake.blocking
+        latency = await _latency(qs, fake, threaded, 10)
+        _LOG.info(
+            "%s: RX latency p50 %.2fms max %.2fms",
+            name,
+            statistics.median(latency) * 1e3,
+            max(latency) * 1e3,
+        )
+    assert len(latency) == 10  # every frame arrived
+    assert fake.rx.empty()
+
+    for idx in range(50):  # a burst is drained in one wakeup
+        fake.rx.put([*FRAME[:6], idx])
+    await asyncio.sleep(0.1)
+    frames = await qs.read_all()
+    assert [f[6] for f in frames] == list(range(50))
+
+    qs.close()
+    assert qs._thread is None
+    with pytest.raises(ConnectionError):
+        await qs.read_all()
+
+
+async def test_writer() -> None:
+    """Coalesce a slider storm, pace the writes and retry unacknowledged SETs."""
+    fake = FakeHid()
+    writer = QsWriter(usb=QsUsb(dev=fake), interval=0.005, ack_timeout=0.02)
+    loop = asyncio.get_running_loop()
+    deaf = "@000002"  # never acknowledges
+
+    def _write(data: QsMsg) -> None:  # on the writer thread
+        fake.tx.append(data)
+        if (qid := string_id(data[3:6])) != deaf:
+            loop.call_soon_threadsafe(writer.ack, qid)
+
+    fake.write = _write  # type: ignore[method-assign]
+    task = asyncio.create_task(writer.run())
+
+    start = time.perf_counter()
+    for val in range(100):  # a slider move, in one loop iteration
+        writer.write(qs_encode("SET", "@000001", val))
+    writer.write(qs_encode("TOGGLE", "@000003", 5))
+    writer.write(qs_encode("TOGGLE", "@000003", 5))
+    writer.write(qs_encode("SET", deaf, 50))
+    for _ in range(500):  # until the deaf device is given up, it is last
+        if writer.dropped:
+            break
+        await asyncio.sleep(0.01)
+    _LOG.info("Writes: %s in %.0fms", writer, (time.perf_counter() - start) * 1e3)
+    task.cancel()
+
+    sent = [(string_id(d[3:6]), d[2]) for d in fake.tx]  # (id, cmd)
+    assert sent[:3] == [("@000001", 9), ("@000003", 8), ("@000003", 8)]
+    assert fake.tx[0][9] == 99  # only the latest brightness
+    assert sent[3:] == [(deaf, 9)] * 3
+    assert (writer.merged, writer.retried, writer.dropped) == (99, 2, 1)
+    assert writer.max_depth == 4
+
+
+async def test_record_replay(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Record frames, replay them at 10x and as fast as possible."""
+    fake = FakeHid()
+    capture = tmp_path / "capture.log"
+    qs = QsUsb(dev=fake, read_timeout=50, record=str(capture))
+    qs.start_reader()
+    for idx in range(3):
+        fake.rx.put([*FRAME[:6], idx])
+        await qs.read_all()
+        await asyncio.sleep(0.02)
+    qs.close()
+
+    player = Player(capture, speed=10)
+    assert [f[6] for _, f in player.frames] == [0, 1, 2]
+    qs = QsUsb(dev=player, read_timeout=50)
+    qs.start_reader()
+    frames = list[QsMsg]()
+    with pytest.raises(ConnectionError):  # end of capture
+        while True:
+            frames.extend(await qs.read_all())
+    qs.close()
+    assert frames == [f for _, f in player.frames]
+    assert len(player.emitted) == 3
+    assert player.emitted == sorted(player.emitted)
+
+    for attr in ("lights", "buttons"):
+        monkeypatch.setattr(OPT, attr, [])
+    synthetic(capture, 500)
+    res = await bench(capture)
+    assert res["frames"] == 500
+    assert res["publishes"] > 300
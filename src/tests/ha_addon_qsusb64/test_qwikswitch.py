@@ -1,6 +1,11 @@
 """Test qs."""
 
-from ha_addon_qsusb64.qwikswitch import parse_id, qs_encode
+import logging
+import time
+
+from ha_addon_qsusb64.qwikswitch import QsFrame, QsMsg, parse_id, qs_encode, s2l
+
+_LOG = logging.getLogger(__name__)
 
 
 def test_id() -> None:
@@ -25,3 +30,64 @@ def test_encode() -> None:
 
     assert qs_encode("SET", "@123457", 7) == [1, 9, 18, 52, 87, 0, 1, 7, 7]
     assert qs_encode("SETTINGS", "@123458", 10) == [1, 10, 18, 52, 88, 0, 0, 0, 0, 10]
+
+
+# Recorded reports: toggle, ping, set, settings, dimmer & relay status
+FRAMES = [
+    s2l(f)
+    for f in (
+        "01 08 12 34 56 00 03 05 5A 00 AA BB",
+        "01 08 12 34 56 00 00 02 40 00 00 00",
+        "01 09 12 34 57 00 02 07 32 00 00 00",
+        "01 0A 12 34 58 00 00 00 00 0A 00 00",
+        "01 0B 12 34 59 00 55 00 81 03 3E 00",
+        "01 0B 12 34 5A 00 55 00 91 02 80 00",
+    )
+]
+
+
+def test_decode() -> None:
+    """Decode each kind of report."""
+    tog, ping, set_, settings, dim, rel = map(QsFrame.decode, FRAMES)
+    assert (tog.id, tog.cmd, tog.cnt, tog.rssi, tog.val) == (
+        "@123456",
+        "TOGGLE",
+        3,
+        90,
+        None,
+    )
+    assert str(tog) == "@123456 TOGGLE rssi=90% x=03.05.5A.00"
+    assert ping.cmd == "TOGGLE.PING"
+    assert (set_.cmd, set_.cnt, set_.val) == ("SET", 2, 0x32)
+    assert str(settings) == "@123458 SETTINGS report=/10min x=00.00.00.0A.00.00"
+    assert (dim.cmd, dim.type, dim.val, dim.rssi) == (
+        "STATUS.ACK",
+        "RX1DIMv3",
+        "51%",
+        85,
+    )
+    assert (rel.type, rel.val) == ("RX1RELv2", "ON")
+    assert QsFrame.decode(s2l("01 0B 00 00 01 00 55 00 81 03 7D 00")).val == "OFF"
+    assert (
+        QsFrame.decode(s2l("01 0B 00 00 01 00 55 00 77 03 7D 00")).type
+        == "UNKNOWN(77)v3"
+    )
+
+
+def test_decode_throughput() -> None:
+    """Log the decode throughput, with and without formatting."""
+    frames = FRAMES * 5000
+    for name, func in (("decode", QsFrame.decode), ("decode+str", _decode_str)):
+        start = time.perf_counter()
+        for data in frames:
+            func(data)
+        _LOG.info(
+            "%s: %.0fk frames/s",
+            name,
+            len(frames) / (time.perf_counter() - start) / 1e3,
+        )
+
+
+def _decode_str(data: QsMsg) -> str:
+    """Decode and format, as with debug logging enabled."""
+    return str(QsFrame.decode(data))